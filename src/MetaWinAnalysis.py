@@ -301,6 +301,7 @@ class MetaAnalysisSimpleStructureDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -502,6 +503,7 @@ class MetaAnalysisGroupedStructureDialog(QDialog):
         self.variance_box = None
         self.group_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -515,8 +517,7 @@ class MetaAnalysisGroupedStructureDialog(QDialog):
         effect_size_label, variance_label = add_effect_choice_to_dialog(self, data, last_effect, last_var)
         group_label = QLabel(get_text("Groups"))
         self.group_box = QComboBox()
-        for col in self.columns:
-            self.group_box.addItem(col.label)
+        self.group_box.addItems(self.column_labels)
 
         self.random_effects_checkbox = QCheckBox(get_text("Include Random Effects Variance?"))
 
@@ -641,6 +642,7 @@ class MetaAnalysisCumulativeStructureDialog(QDialog):
         self.variance_box = None
         self.cumulative_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -654,8 +656,7 @@ class MetaAnalysisCumulativeStructureDialog(QDialog):
         effect_size_label, variance_label = add_effect_choice_to_dialog(self, data, last_effect, last_var)
         cumulative_label = QLabel(get_text("Cumulative Order"))
         self.cumulative_box = QComboBox()
-        for col in self.columns:
-            self.cumulative_box.addItem(col.label)
+        self.cumulative_box.addItems(self.column_labels)
 
         self.random_effects_checkbox = QCheckBox(get_text("Include Random Effects Variance?"))
 
@@ -765,6 +766,7 @@ class MetaAnalysisLinearStructureDialog(QDialog):
         self.variance_box = None
         self.ind_var_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -778,8 +780,7 @@ class MetaAnalysisLinearStructureDialog(QDialog):
         effect_size_label, variance_label = add_effect_choice_to_dialog(self, data, last_effect, last_var)
         ind_var_label = QLabel(get_text("Independent Variable"))
         self.ind_var_box = QComboBox()
-        for col in self.columns:
-            self.ind_var_box.addItem(col.label)
+        self.ind_var_box.addItems(self.column_labels)
 
         self.random_effects_checkbox = QCheckBox(get_text("Include Random Effects Variance?"))
 
@@ -905,6 +906,7 @@ class MetaAnalysisComplexStructureDialog(QDialog):
         self.cat_box = None
         self.cont_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -1066,6 +1068,7 @@ class MetaAnalysisNestedStructureDialog(QDialog):
         self.variance_box = None
         self.nest_box = None
         self.columns = None
+        self.column_labels = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
 
@@ -1231,6 +1234,7 @@ class MetaAnalysisPhylogeneticStructureDialog(QDialog):
         self.drag_label = None
         self.tips_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -1256,7 +1260,7 @@ class MetaAnalysisPhylogeneticStructureDialog(QDialog):
         self.tips_box = QComboBox()
         for col in self.columns:
             self.unused_box.addItem(create_list_item(col))
-            self.tips_box.addItem(col.label)
+        self.tips_box.addItems(self.column_labels)
 
         self.drag_label = QLabel(get_text("Drag and drop variables to indicate desired structure"))
         ind_layout.addWidget(self.unused_label, 1, 0)
@@ -1432,6 +1436,7 @@ class MetaAnalysisJackknifeDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
@@ -14,7 +14,7 @@ import scipy.stats
 import MetaWinConstants
 from MetaWinConstants import mean_data_tuple
 from MetaWinUtils import create_output_table, inline_float, interval_to_str, get_citation, exponential_label, \
-    prob_z_score, strong_text
+    prob_z_score, prob_chi2, strong_text
 import MetaWinCharts
 import MetaWinWidgets
 from MetaWinLanguage import get_text
@@ -34,6 +34,9 @@ reg_ma_values = namedtuple("reg_ma_values", ["global_values", "model_het_values"
 
 i2_values = namedtuple("i2_values", ["source", "i2", "i2_lower", "i2_upper"])
 
+# the largest number of resampled values (replicates × studies) drawn at once when bootstrapping or randomizing
+RESAMPLE_BLOCK_CELLS = 1000000
+
 
 # --- failsafe numbers ---
 def failsafe_numbers(options, output_blocks: list, n: int, e_data, v_data, mean_e, pooled_var,  sum_w, sum_ew,
@@ -246,11 +249,9 @@ def pooled_var_group_structure(qe, group_w_sums: list, n: int, g_cnt: int) -> fl
 
 
 def pooled_var_regression_structure(qe, n: int, sum_w, sum_wx, sum_wx2, x_data,  w_data) -> float:
-    d_sum = 0
-    for j in range(n):
-        term2 = 2*x_data[j] * sum_wx
-        term3 = x_data[j]**2 * sum_w
-        d_sum += w_data[j]**2 * ((sum_wx2 - term2 + term3)/(sum_w*sum_wx2 - sum_wx**2))
+    term2 = 2*x_data * sum_wx
+    term3 = numpy.square(x_data) * sum_w
+    d_sum = numpy.sum(numpy.square(w_data) * (sum_wx2 - term2 + term3)) / (sum_w*sum_wx2 - sum_wx**2)
     pooled = (qe - (n-2))/(sum_w - d_sum)
     return max(pooled, 0)
 
@@ -258,9 +259,10 @@ def pooled_var_regression_structure(qe, n: int, sum_w, sum_wx, sum_wx2, x_data,
 def pooled_var_glm(qe, n: int, w: numpy.array, x: numpy.array) -> float:
     np = numpy.shape(x)[1] - 1
     numerator = qe - (n - np - 1)
-    xt = numpy.transpose(x)
-    xtwxinv = numpy.linalg.inv(numpy.matmul(numpy.matmul(xt, w), x))
-    val = numpy.matmul(numpy.matmul(numpy.matmul(numpy.matmul(w, x), xtwxinv), xt), w)
+    xtw = numpy.matmul(numpy.transpose(x), w)
+    xtwxinv = numpy.linalg.inv(numpy.matmul(xtw, x))
+    # trace(W X (X'WX)^-1 X' W) = trace((X'WX)^-1 X'WWX), which only needs p x p rather than n x n products
+    val = numpy.matmul(xtwxinv, numpy.matmul(xtw, numpy.transpose(xtw)))
     pooled = numerator / (numpy.trace(w) - numpy.trace(val))
     return max(pooled, 0)
 
@@ -307,41 +309,39 @@ def bootstrap_means(bootstrap_n, boot_data, obs_mean, pooled_var, random_effects
     """
     if bootstrap_n is not None:
         rng = numpy.random.default_rng()
-        all_means = [obs_mean]
+        boot_e = boot_data[:, 0]
+        boot_v = boot_data[:, 1]
+        """
+        for random effects models I'm keeping the process from MW2 where the pooled variance is only
+        calculated once from all of the effect size data, rather than recalculated for each bootstrap
+        replicate
 
-        # if sender is not None:
-        #     progress = MetaWinWidgets.progress_bar(sender, "Resampling Analysis", "Bootstrap Progress", bootstrap_n)
-        # else:
-        #     progress = None
+        should consider whether this has to change or should be an either/or option
+        """
+        if random_effects:
+            boot_w = numpy.reciprocal(boot_v + pooled_var)
+        else:
+            boot_w = numpy.reciprocal(boot_v)
+
+        # replicates are drawn and averaged a block at a time, each row of a block being one resampled data set;
+        # the draws are identical to resampling one replicate at a time
+        k = len(boot_data)
+        block_size = max(1, RESAMPLE_BLOCK_CELLS // k)
+        rep_means = numpy.empty(bootstrap_n)
+        for start in range(0, bootstrap_n, block_size):
+            stop = min(start + block_size, bootstrap_n)
+            resample = rng.integers(0, k, size=(stop - start, k))
+            tmp_w = boot_w[resample]
+            rep_means[start:stop] = numpy.sum(boot_e[resample] * tmp_w, axis=1) / numpy.sum(tmp_w, axis=1)
+            if progress_bar is not None:
+                progress_bar.setValue(progress_bar.value() + stop - start)
 
         # f = 0.5  # count the observation as half less than itself
-        f = 0
-        for i in range(bootstrap_n):
-            tmp_data = rng.choice(boot_data, len(boot_data))
-            tmp_e = tmp_data[:, 0]
-            tmp_v = tmp_data[:, 1]
-            """
-            for random effects models I'm keeping the process from MW2 where the pooled variance is only
-            calculated once from all of the effect size data, rather than recalculated for each bootstrap
-            replicate
-
-            should consider whether this has to change or should be an either/or option
-            """
-            if random_effects:
-                tmp_w = numpy.reciprocal(tmp_v + pooled_var)
-            else:
-                tmp_w = numpy.reciprocal(tmp_v)
-
-            tmp_mean, *_ = mean_effect_var_and_q(tmp_e, tmp_w)
-            if tmp_mean < obs_mean:
-                f += 1
-            # in MW2 we counted ties as 1/2, that doesn't seem to be common in the lit, but may be due to a lack
-            # of imagination assuming one would never get a tie
-            # elif tmp_mean_e == mean_e:
-            #     f += 0.5
-            all_means.append(tmp_mean)
-            if progress_bar is not None:
-                progress_bar.setValue(progress_bar.value() + 1)
+        # in MW2 we counted ties as 1/2, that doesn't seem to be common in the lit, but may be due to a lack
+        # of imagination assuming one would never get a tie
+        f = numpy.count_nonzero(rep_means < obs_mean)
+        all_means = [obs_mean]
+        all_means.extend(rep_means)
         all_means.sort()
         lower_index = round((bootstrap_n + 1) * alpha / 2)
         upper_index = round(bootstrap_n - (bootstrap_n + 1) * alpha / 2)
@@ -365,6 +365,23 @@ def bootstrap_means(bootstrap_n, boot_data, obs_mean, pooled_var, random_effects
     return lower_bs_ci, upper_bs_ci, lower_bias_ci, upper_bias_ci
 
 
+def permutation_blocks(rng, values: numpy.array, nreps: int, progress_bar=None):
+    """
+    generate nreps random permutations of values for a randomization test, a block at a time, with each row of
+    a block being one permuted data set
+    """
+    k = len(values)
+    block_size = max(1, RESAMPLE_BLOCK_CELLS // k)
+    for start in range(0, nreps, block_size):
+        stop = min(start + block_size, nreps)
+        # each row is shuffled in place, so the block is only allocated once
+        block = numpy.tile(values, (stop - start, 1))
+        rng.permuted(block, axis=1, out=block)
+        yield block
+        if progress_bar is not None:
+            progress_bar.setValue(progress_bar.value() + stop - start)
+
+
 def calc_i2(qt, n, alpha: float = 0.05):
     try:
         i2 = max(0, 100 * (qt - (n - 1))/qt)
@@ -619,7 +636,7 @@ def simple_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
             output_blocks.append([get_text("Estimate of pooled variance") + ": " +
                                   format(pooled_var, inline_float(decimal_places))])
 
-        p = 1 - scipy.stats.chi2.cdf(qt, df=df)
+        p = prob_chi2(qt, df)
 
         if norm_ci:
             lower_ci, upper_ci = scipy.stats.norm.interval(confidence=1-alpha, loc=mean_e, scale=math.sqrt(var_e))
@@ -798,7 +815,7 @@ def grouped_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
             group_mean, group_var, group_qw, _, _, _ = mean_effect_var_and_q(group_e, group_w)
             group_median = median_effect(group_e, group_w)
             qe += group_qw
-            group_p = 1 - scipy.stats.chi2.cdf(group_qw, df=group_df)
+            group_p = prob_chi2(group_qw, group_df)
             if norm_ci:
                 group_lower, group_upper = scipy.stats.norm.interval(confidence=1 - alpha, loc=group_mean,
                                                                      scale=math.sqrt(group_var))
@@ -836,10 +853,10 @@ def grouped_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
         forest_data = [global_mean_data]
         forest_data.extend(group_mean_values)
 
-        pqt = 1 - scipy.stats.chi2.cdf(qt, df=n-1)
-        pqe = 1 - scipy.stats.chi2.cdf(qe, df=n-g_cnt)
+        pqt = prob_chi2(qt, n-1)
+        pqe = prob_chi2(qe, n-g_cnt)
         qm = qt - qe
-        pqm = 1 - scipy.stats.chi2.cdf(qm, df=g_cnt-1)
+        pqm = prob_chi2(qm, g_cnt-1)
         df = n-1
 
         global_het_data = heterogeneity_test_tuple(get_text("Total"), qt, df, pqt, "")
@@ -858,21 +875,16 @@ def grouped_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
             rng = numpy.random.default_rng()
             if progress_bar is not None:
                 progress_bar.setLabelText(get_text("Conducting Randomization Analysis"))
-            for rep in range(nreps):
+            group_masks = [numpy.array([g == group for g in group_data]) for group in group_names]
+            for rand_block in permutation_blocks(rng, e_data, nreps, progress_bar):
                 tmp_qe = 0
-                # rand_group_data = rng.permutation(group_data)
-                rand_e_data = rng.permutation(e_data)
-                for group in group_names:
-                    group_mask = [g == group for g in group_data]
-                    group_e = rand_e_data[group_mask]
+                for group_mask in group_masks:
+                    group_e = rand_block[:, group_mask]
                     group_w = ws_data[group_mask]
-                    _, _, group_qw, _, _, _ = mean_effect_var_and_q(group_e, group_w)
-                    tmp_qe += group_qw
+                    group_mean = numpy.matmul(group_e, group_w) / numpy.sum(group_w)
+                    tmp_qe += numpy.matmul(numpy.square(group_e - group_mean[:, numpy.newaxis]), group_w)
                 tmp_qmodel = qt - tmp_qe
-                if tmp_qmodel >= qm:
-                    cnt += 1
-                if progress_bar is not None:
-                    progress_bar.setValue(progress_bar.value() + 1)
+                cnt += numpy.count_nonzero(tmp_qmodel >= qm)
             p_random = cnt / (nreps + 1)
             p_random_str = format(p_random, inline_float(rand_p_dec))
         else:
@@ -988,7 +1000,7 @@ def cumulative_meta_analysis(data, options, decimal_places: int = 4, alpha: floa
             if options.random_effects:
                 ws_data = numpy.reciprocal(tmp_v + pooled_var)
                 mean_e, var_e, qt, *_ = mean_effect_var_and_q(tmp_e, ws_data)
-            p = 1 - scipy.stats.chi2.cdf(qt, df=df)
+            p = prob_chi2(qt, df)
             if norm_ci:
                 lower_ci, upper_ci = scipy.stats.norm.interval(confidence=1-alpha, loc=mean_e, scale=math.sqrt(var_e))
             else:
@@ -1130,9 +1142,9 @@ def regression_meta_analysis(data, options, decimal_places: int = 4, alpha: floa
         mean_data = mean_data_tuple(get_text("Global"), 0, n, mean_e, median_e, var_e, mean_v, lower_ci, upper_ci,
                                     lower_bs_ci, upper_bs_ci, lower_bias_ci, upper_bias_ci)
 
-        pqt = 1 - scipy.stats.chi2.cdf(qt, df=n-1)
-        pqe = 1 - scipy.stats.chi2.cdf(qe, df=n-2)
-        pqm = 1 - scipy.stats.chi2.cdf(qm, df=1)
+        pqt = prob_chi2(qt, n-1)
+        pqe = prob_chi2(qe, n-2)
+        pqm = prob_chi2(qm, 1)
 
         global_het_data = heterogeneity_test_tuple(get_text("Total"), qt, n-1, pqt, "")
 
@@ -1152,14 +1164,14 @@ def regression_meta_analysis(data, options, decimal_places: int = 4, alpha: floa
             rand_p_dec = max(decimal_places, math.ceil(math.log10(nreps+1)))
             cnt_q = 1
             rng = numpy.random.default_rng()
-            for rep in range(nreps):
-                rand_e_data = rng.permutation(e_data)
-                (rand_qm, rand_qe, rand_b1_slope, rand_b0_intercept,
-                 _, _, _, _) = calculate_regression_ma_values(rand_e_data, ws_data, x_data, sum_ws, sum_wse, qt)
-                if rand_qm >= qm:
-                    cnt_q += 1
-                if progress_bar is not None:
-                    progress_bar.setValue(progress_bar.value() + 1)
+            # only sum(w*x*e) changes when the effects are permuted, so the rest of calculate_regression_ma_values
+            # is computed once
+            sum_wsx = numpy.sum(ws_data * x_data)
+            ss_x = numpy.sum(ws_data * numpy.square(x_data)) - sum_wsx ** 2 / sum_ws
+            for rand_block in permutation_blocks(rng, e_data, nreps, progress_bar):
+                rand_b1_slope = (numpy.matmul(rand_block, ws_data * x_data) - sum_wsx * sum_wse / sum_ws) / ss_x
+                rand_qm = rand_b1_slope ** 2 * ss_x
+                cnt_q += numpy.count_nonzero(rand_qm >= qm)
             p_random = cnt_q / (nreps + 1)
             p_random_str = format(p_random, inline_float(rand_p_dec))
         else:
@@ -1237,10 +1249,10 @@ def check_data_for_glm(output_blocks, n, cat_data, cat_labels) -> bool:
 
 
 def calculate_glm(e: numpy.array, x: numpy.array, w: numpy.array):
-    xt = numpy.transpose(x)
-    xtwx = numpy.matmul(numpy.matmul(xt, w), x)
+    xtw = numpy.matmul(numpy.transpose(x), w)  # X'W is shared by X'WX and X'We
+    xtwx = numpy.matmul(xtw, x)
     xtwxinv = numpy.linalg.inv(xtwx)  # this is also sigma_b
-    beta = numpy.matmul(numpy.matmul(numpy.matmul(xtwxinv, xt), w), e)
+    beta = numpy.matmul(xtwxinv, numpy.matmul(xtw, e))
     red_beta = beta[1:]
     red_sigma = xtwxinv[1:, 1:]
     qm = numpy.matmul(numpy.matmul(numpy.transpose(red_beta), numpy.linalg.inv(red_sigma)), red_beta)
@@ -1368,9 +1380,9 @@ def complex_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
             df = n-1
             dfm = numpy.shape(x_data)[1] - 1
             dfe = n - dfm - 1
-            pqt = 1 - scipy.stats.chi2.cdf(qt, df=df)
-            pqe = 1 - scipy.stats.chi2.cdf(qe, df=dfe)
-            pqm = 1 - scipy.stats.chi2.cdf(qm, df=dfm)
+            pqt = prob_chi2(qt, df)
+            pqe = prob_chi2(qe, dfe)
+            pqm = prob_chi2(qm, dfm)
 
             if ((options.bootstrap_mean is not None) or (options.randomize_model is not None)) and (sender is not None):
                 if options.randomize_model is not None:
@@ -1416,13 +1428,14 @@ def complex_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
                 rand_p_dec = max(decimal_places, math.ceil(math.log10(nreps+1)))
                 cnt_q = 1
                 rng = numpy.random.default_rng()
-                for rep in range(nreps):
-                    rand_e_data = rng.permutation(e_data)
-                    rand_qm, _, _, _ = calculate_glm(rand_e_data, x_data, w_matrix)
-                    if rand_qm >= qm:
-                        cnt_q += 1
-                    if progress_bar is not None:
-                        progress_bar.setValue(progress_bar.value() + 1)
+                # beta = (X'WX)^-1 X'W e is linear in e, so the permuted betas and their Qm are found for a whole
+                # block of permutations at once, the same as calculate_glm would find them one at a time
+                beta_matrix = numpy.matmul(sigma_b, numpy.matmul(numpy.transpose(x_data), w_matrix))
+                red_sigma_inv = numpy.linalg.inv(sigma_b[1:, 1:])
+                for rand_block in permutation_blocks(rng, e_data, nreps, progress_bar):
+                    rand_red_beta = numpy.matmul(rand_block, numpy.transpose(beta_matrix[1:]))
+                    rand_qm = numpy.sum(numpy.matmul(rand_red_beta, red_sigma_inv) * rand_red_beta, axis=1)
+                    cnt_q += numpy.count_nonzero(rand_qm >= qm)
                 p_random = cnt_q / (nreps + 1)
                 p_random_str = format(p_random, inline_float(rand_p_dec))
             else:
@@ -1551,7 +1564,7 @@ class NestedGroup:
         group_df = group_n - 1
         self.mean, group_var, self.qw, group_sum_w, _, group_sum_ew = mean_effect_var_and_q(group_e, group_w)
         group_median = median_effect(group_e, group_w)
-        group_p = 1 - scipy.stats.chi2.cdf(self.qw, df=group_df)
+        group_p = prob_chi2(self.qw, group_df)
 
         if norm_ci:
             group_lower, group_upper = scipy.stats.norm.interval(confidence=1 - alpha, loc=self.mean,
@@ -1713,7 +1726,7 @@ def nested_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
         global_mean_data = mean_data_tuple(get_text("Global"), 0, n, mean_e, median_e, var_e, mean_v, lower_ci,
                                            upper_ci, lower_bs_ci, upper_bs_ci, lower_bias_ci, upper_bias_ci)
         df = n-1
-        pqt = 1 - scipy.stats.chi2.cdf(qt, df=df)
+        pqt = prob_chi2(qt, df)
         global_het_data = heterogeneity_test_tuple(get_text("Total"), qt, df, pqt, "")
 
         i2, i2_lower, i2_upper = calc_i2(qt, n, alpha)
@@ -1743,7 +1756,7 @@ def nested_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
                 ng += tn
             dfm = ng - prev_n
             prev_n = ng
-            pqm = 1 - scipy.stats.chi2.cdf(qm, df=dfm)
+            pqm = prob_chi2(qm, dfm)
             model_het_values.append(heterogeneity_test_tuple("Qm ({})".format(level_name), qm, dfm, pqm, ""))
 
         # extract Qerror from the lowest level of the nested hierarchy
@@ -1754,7 +1767,7 @@ def nested_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
             qe += cq
             ng += cn
         dfe = n - ng
-        pqe = 1 - scipy.stats.chi2.cdf(qe, df=dfe)
+        pqe = prob_chi2(qe, dfe)
         error_het_values = heterogeneity_test_tuple("Qe", qe, dfe, pqe, "")
 
         # aic = calc_aic(qe, n, ng)
@@ -1986,25 +1999,32 @@ def nested_meta_analysis(data, options, decimal_places: int = 4, alpha: float =
 # ---------- phylogenetic meta-analysis ----------
 def phylogenetic_correlation(tip_names, root):
     n = len(tip_names)
-    p = numpy.zeros(shape=(n, n))
     # find depth of most recent common ancestor of included taxa
     mrca = root.find_tip_by_name(tip_names[0])
     for name1 in tip_names[1:]:
         tip1 = root.find_tip_by_name(name1)
         mrca = tip1.common_ancestor(mrca)
     max_depth = mrca.max_node_tip_length()
-    for i, name1 in enumerate(tip_names):
-        tip1 = root.find_tip_by_name(name1)
-        for j in range(i+1):  # take advantage of symmetry
-            name2 = tip_names[j]
-            tip2 = root.find_tip_by_name(name2)
-            if i == j:
-                p[i, j] = 1
-            else:
-                common_ancestor = tip1.common_ancestor(tip2)
-                shared_dist = common_ancestor.distance_to_ancestor(mrca)
-                p[i, j] = shared_dist/max_depth
-                p[j, i] = p[i, j]
+    nodes, parent, branch_lengths = root.to_arrays()
+    node_index = {}
+    for i, node in enumerate(nodes):
+        node_index.setdefault(node.name, i)  # first match, as with find_tip_by_name
+    # the branches of the mrca and of the nodes above it are not part of the shared history of the taxa
+    shared_lengths = branch_lengths.copy()
+    k = nodes.index(mrca)
+    while k >= 0:
+        shared_lengths[k] = 0
+        k = parent[k]
+    # ancestors[i, k] is 1 if node k lies above the tip of the ith taxon; the shared distance of two taxa is then
+    # the sum of the branch lengths of the ancestors they have in common
+    ancestors = numpy.zeros(shape=(n, len(nodes)))
+    for i, name in enumerate(tip_names):
+        k = parent[node_index[name]]
+        while k >= 0:
+            ancestors[i, k] = 1
+            k = parent[k]
+    p = (ancestors * shared_lengths) @ ancestors.T / max_depth
+    numpy.fill_diagonal(p, 1)
     return p
 
 
@@ -2161,9 +2181,9 @@ def phylogenetic_meta_analysis(data, options, tree, decimal_places: int = 4, alp
             df = n-1
             dfm = numpy.shape(x_data)[1] - 1
             dfe = n - dfm - 1
-            pqt = 1 - scipy.stats.chi2.cdf(qt, df=df)
-            pqe = 1 - scipy.stats.chi2.cdf(qe, df=dfe)
-            pqm = 1 - scipy.stats.chi2.cdf(qm, df=dfm)
+            pqt = prob_chi2(qt, df)
+            pqe = prob_chi2(qe, dfe)
+            pqm = prob_chi2(qm, dfm)
 
             # aic = calc_aic(qe, n, dfm + 2)
             # print("AIC:", round(aic, 4))
@@ -2314,7 +2334,7 @@ def jackknife_meta_analysis(data, options, decimal_places: int = 4, alpha: float
             output_blocks.append([get_text("Estimate of pooled variance") + ": " +
                                   format(pooled_var, inline_float(decimal_places))])
 
-        p = 1 - scipy.stats.chi2.cdf(qt, df=df)
+        p = prob_chi2(qt, df)
         if norm_ci:
             lower_ci, upper_ci = scipy.stats.norm.interval(confidence=1-alpha, loc=mean_e, scale=math.sqrt(var_e))
         else:
@@ -2358,7 +2378,7 @@ def jackknife_meta_analysis(data, options, decimal_places: int = 4, alpha: float
                 ws_data = numpy.reciprocal(tmp_v + pooled_var)
                 mean_e, var_e, qt, *_ = mean_effect_var_and_q(tmp_e, ws_data)
                 median_e = median_effect(tmp_e, ws_data)
-            p = 1 - scipy.stats.chi2.cdf(qt, df=df)
+            p = prob_chi2(qt, df)
             if norm_ci:
                 lower_ci, upper_ci = scipy.stats.norm.interval(confidence=1-alpha, loc=mean_e, scale=math.sqrt(var_e))
             else:
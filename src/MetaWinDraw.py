@@ -45,9 +45,9 @@ class MetaAnalysisDrawScatterDialog(QDialog):
         self.x_box = QComboBox()
         self.y_box = QComboBox()
         self.columns = data.cols
-        for col in self.columns:
-            self.x_box.addItem(col.label)
-            self.y_box.addItem(col.label)
+        column_labels = data.column_labels()
+        self.x_box.addItems(column_labels)
+        self.y_box.addItems(column_labels)
         x_label = QLabel(get_text("Data for X-axis"))
         y_label = QLabel(get_text("Data for Y-axis"))
         # info_label = QLabel(get_text("note_funnel_plot"))
@@ -84,6 +84,7 @@ class MetaAnalysisDrawNormalQuantileDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.init_ui(data, last_effect, last_var)
 
     def init_ui(self, data: MetaWinData, last_effect, last_var):
@@ -126,6 +127,7 @@ class MetaAnalysisDrawRadialDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.log_transform_box = None
         self.init_ui(data, last_effect, last_var)
 
@@ -185,9 +187,9 @@ class MetaAnalysisDrawHistogramDialog(QDialog):
         self.effect_size_box = QComboBox()
         self.weight_box = QComboBox()
         self.columns = data.cols
-        for col in self.columns:
-            self.effect_size_box.addItem(col.label)
-            self.weight_box.addItem(col.label)
+        column_labels = data.column_labels()
+        self.effect_size_box.addItems(column_labels)
+        self.weight_box.addItems(column_labels)
         if last_effect is not None:
             if last_var is None:
                 last_var = last_effect.effect_var
@@ -256,6 +258,7 @@ class MetaAnalysisDrawForestDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.init_ui(data, last_effect, last_var)
 
     def init_ui(self, data: MetaWinData, last_effect, last_var):
@@ -143,13 +143,10 @@ class EffectSizesDialog(QDialog):
         self.control_box_3 = QComboBox()
         self.treatment_box_3 = QComboBox()
         self.columns = data.cols
-        for col in data.cols:
-            self.control_box_1.addItem(col.label)
-            self.treatment_box_1.addItem(col.label)
-            self.control_box_2.addItem(col.label)
-            self.treatment_box_2.addItem(col.label)
-            self.control_box_3.addItem(col.label)
-            self.treatment_box_3.addItem(col.label)
+        column_labels = data.column_labels()
+        for box in (self.control_box_1, self.treatment_box_1, self.control_box_2, self.treatment_box_2,
+                    self.control_box_3, self.treatment_box_3):
+            box.addItems(column_labels)
 
         self.box_1_label = QLabel("")
         self.box_2_label = QLabel("")
@@ -179,8 +176,7 @@ class EffectSizesDialog(QDialog):
         self.polarity_checkbox.clicked.connect(self.polarity_change)
         polarity_layout.addWidget(self.polarity_checkbox)
         self.polarity_choice_box = QComboBox()
-        for col in data.cols:
-            self.polarity_choice_box.addItem(col.label)
+        self.polarity_choice_box.addItems(data.column_labels())
         polarity_layout.addWidget(self.polarity_choice_box)
         polarity_layout.addStretch(1)
         polarity_box.setLayout(polarity_layout)
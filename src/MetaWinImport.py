@@ -4,7 +4,7 @@ the options, the actual writing to file is handled by the calling functions
 """
 
 import webbrowser
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union
 
 from PyQt6.QtWidgets import QDialog, QCheckBox, QLabel, QTableWidget, QVBoxLayout, QHBoxLayout, QGridLayout, \
     QLineEdit, QFrame, QTableWidgetItem
@@ -266,22 +266,37 @@ def split_text_data(raw_data: list, import_options: ImportTextOptions) -> MetaWi
     return new_data
 
 
+def string_to_number(s: str) -> Union[int, float, None]:
+    """
+    Convert a string to int (preferred) or float if it is a number; otherwise return None
+    """
+    # every string accepted by int() is also accepted by float(), so trying float() first means a text
+    # value only raises a single exception
+    try:
+        x = float(s)
+    except ValueError:
+        return None
+    try:
+        return int(s)
+    except ValueError:
+        return x
+
+
 def convert_strings_to_numbers(data: MetaWinData) -> None:
     """
     Check each imported data value and convert to int (preferred) or float if it is a number; otherwise
     leave as a string
     """
+    # categorical columns and sample sizes repeat the same strings many times, so each distinct string is only
+    # converted once; None marks a string which is not a number
+    converted = {}
     for c in data.cols:
         for d in c.values:
-            try:
-                x = int(d.value)
+            if d.value not in converted:
+                converted[d.value] = string_to_number(d.value)
+            x = converted[d.value]
+            if x is not None:
                 d.value = x
-            except ValueError:
-                try:
-                    x = float(d.value)
-                    d.value = x
-                except ValueError:
-                    pass
 
 
 def import_data(sender, filename: str) -> Tuple[Optional[MetaWinData], Optional[list]]:
@@ -328,7 +343,7 @@ def import_phylogeny(sender, filename: str) -> Tuple[Optional[MetaWinTree.Node],
                       get_text("Imported phylogeny contains {} tips").format(new_phylogeny.n_tips())]
             output_blocks.append(output)
             return new_phylogeny, output_blocks
-        except IndexError:
+        except (IndexError, ValueError):
             MetaWinMessages.report_critical(sender, get_text("Import Error"),
                                             get_text("error_not_newick").format(filename))
     except IOError:
@@ -1,6 +1,8 @@
 """
 Localization of text
 """
+import functools
+
 import MetaWinConstants
 
 current_language = "English"
@@ -329,6 +331,8 @@ ENGLISH_DICTIONARY = {"error_not_text_file": "{} does not appear to be a text fi
                       "Randomization Test for Model Structure": "Randomization Test for Model Structure",
                       "Randomization Test for Phylogenetic Structure": "Randomization Test for Phylogenetic Structure",
                       "Randomization to test correlation": "Randomization to test correlation",
+                      "randomization_early_stop": "Randomization was stopped after {:,} iterations, as the "
+                                                  "probability was clearly above or below &alpha; = {}.",
                       "Rank Correlation Analysis": "Rank Correlation Analysis",
                       "Rank Correlation Method": "Rank Correlation Method",
                       "Rank Correlation Results": "Rank Correlation Results",
@@ -445,6 +449,16 @@ def language_list() -> list:
     return sorted(LANGUAGE_DICTIONARY.keys())
 
 
+def set_language(language: str) -> None:
+    """
+    change the current language, discarding any text cached for the previous language
+    """
+    global current_language
+    current_language = language
+    get_text.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
 def get_text(key: str) -> str:
     try:
         text = LANGUAGE_DICTIONARY[current_language][key]
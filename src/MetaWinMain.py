@@ -43,7 +43,7 @@ class MainWindow(QMainWindow):
         self.tree_area = None
         self.tree_info_label = None
         self.clicked_header = None
-        MetaWinLanguage.current_language = config["language"]
+        MetaWinLanguage.set_language(config["language"])
         MetaWinCharts.color_name_space = config["color name space"]
         self.output_decimals = config["output decimals"]
         self.data_decimals = config["data decimals"]
@@ -872,7 +872,7 @@ class MainWindow(QMainWindow):
         # for lang in self.language_actions.actions():
         #     if lang.isChecked():
         #         MetaWinLanguage.current_language = lang.text()
-        MetaWinLanguage.current_language = self.language_box.currentText()
+        MetaWinLanguage.set_language(self.language_box.currentText())
 
     def localization(self) -> None:
         webbrowser.open(self.localization_help)
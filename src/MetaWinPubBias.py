@@ -47,26 +47,27 @@ class PubBiasOptions:
         output_blocks = []
         citations = []
         if self.pub_bias_test is not None:
+            citations_text = get_text("Citations")
             output = []
             if self.pub_bias_test == TRIM_FILL:
                 output.append(get_text("Trim and Fill Analysis"))
-                output.append("→ {}: ".format(get_text("Citations")) + get_citation("Duval_Tweedie_2000a") + ", " +
-                              get_citation("Duval_Tweedie_2000b"))
+                output.append(f"→ {citations_text}: {get_citation("Duval_Tweedie_2000a")}, "
+                              f"{get_citation("Duval_Tweedie_2000b")}")
                 citations.append("Duval_Tweedie_2000a")
                 citations.append("Duval_Tweedie_2000b")
             elif self.pub_bias_test == RANKCOR:
                 output.append(get_text("Rank Correlation Analysis"))
-                output.append("→ {}: ".format(get_text("Citations")) + get_citation("Begg_1994") + ", " +
-                              get_citation("Begg_Mazumdar_1994"))
+                output.append(f"→ {citations_text}: {get_citation("Begg_1994")}, "
+                              f"{get_citation("Begg_Mazumdar_1994")}")
                 citations.append("Begg_1994")
                 citations.append("Begg_Mazumdar_1994")
             elif self.pub_bias_test == FUNNEL:
                 output.append(get_text("Funnel Plot"))
-                output.append("→ {}: ".format(get_text("Citations")) + get_citation("Light_Pillemer_1984"))
+                output.append(f"→ {citations_text}: {get_citation("Light_Pillemer_1984")}")
                 citations.append("Light_Pillemer_1984")
             elif self.pub_bias_test == EGGER:
                 output.append(get_text("Egger Regression"))
-                output.append("→ {}: ".format(get_text("Citations")) + get_citation("Egger_et_1997"))
+                output.append(f"→ {citations_text}: {get_citation("Egger_et_1997")}")
                 citations.append("Egger_et_1997")
             if self.pub_bias_test in (TRIM_FILL, EGGER):
                 if self.random_effects:
@@ -185,6 +186,7 @@ class PubBiasTrimFillDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.random_effects_checkbox = None
         self.log_transform_box = None
         self.graph_checkbox = None
@@ -266,7 +268,9 @@ class PubBiasRankCorrelationDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.sample_size_box = None
+        self.sample_size_populated = False
         self.columns = None
+        self.column_labels = None
         self.kendall_button = None
         self.spearman_button = None
         self.n_button = None
@@ -282,9 +286,8 @@ class PubBiasRankCorrelationDialog(QDialog):
 
         effect_size_label, variance_label = add_effect_choice_to_dialog(self, data, last_effect, last_var)
 
+        # the sample size choices are only filled in if the user chooses to correlate with sample size
         self.sample_size_box = QComboBox()
-        for col in self.columns:
-            self.sample_size_box.addItem(col.label)
 
         options_layout = QVBoxLayout()
         options_layout.addWidget(effect_size_label)
@@ -296,8 +299,7 @@ class PubBiasRankCorrelationDialog(QDialog):
         cor_layout = QVBoxLayout()
         self.n_button = QRadioButton(get_text("Sample Size"))
         self.v_button = QRadioButton(get_text("Variance"))
-        self.n_button.clicked.connect(self.click_correlation_variable)
-        self.v_button.clicked.connect(self.click_correlation_variable)
+        self.n_button.toggled.connect(self.click_correlation_variable)
         cor_layout.addWidget(self.v_button)
         cor_layout.addWidget(self.n_button)
         cor_layout.addWidget(self.sample_size_box)
@@ -345,6 +347,9 @@ class PubBiasRankCorrelationDialog(QDialog):
 
     def click_correlation_variable(self):
         if self.n_button.isChecked():
+            if not self.sample_size_populated:
+                self.sample_size_box.addItems(self.column_labels)
+                self.sample_size_populated = True
             self.sample_size_box.setEnabled(True)
         else:
             self.sample_size_box.setEnabled(False)
@@ -374,6 +379,7 @@ class PubBiasFunnelPlotDialog(QDialog):
         self.variance_box = None
         self.sample_size_box = None
         self.columns = None
+        self.column_labels = None
         self.n_button = None
         self.v_button = None
         self.invv_button = None
@@ -394,8 +400,7 @@ class PubBiasFunnelPlotDialog(QDialog):
         effect_size_label, variance_label = add_effect_choice_to_dialog(self, data, last_effect, last_var)
 
         self.sample_size_box = QComboBox()
-        for col in self.columns:
-            self.sample_size_box.addItem(col.label)
+        self.sample_size_box.addItems(self.column_labels)
         self.sample_size_label = QLabel(get_text("Sample Size"))
 
         options_layout = QVBoxLayout()
@@ -414,11 +419,8 @@ class PubBiasFunnelPlotDialog(QDialog):
         self.se_button = QRadioButton(get_text("Standard Error"))
         self.prec_button = QRadioButton(get_text("Precision"))
 
-        self.n_button.clicked.connect(self.click_y_variable)
-        self.v_button.clicked.connect(self.click_y_variable)
-        self.invv_button.clicked.connect(self.click_y_variable)
-        self.se_button.clicked.connect(self.click_y_variable)
-        self.prec_button.clicked.connect(self.click_y_variable)
+        # only the sample size choice changes which other widgets are enabled
+        self.n_button.toggled.connect(self.click_y_variable)
 
         y_layout.addWidget(self.n_button)
         y_layout.addWidget(self.v_button)
@@ -501,6 +503,7 @@ class PubBiasEggerDialog(QDialog):
         self.effect_size_box = None
         self.variance_box = None
         self.columns = None
+        self.column_labels = None
         self.graph_checkbox = None
         self.random_effects_checkbox = None
         self.init_ui(data, last_effect, last_var)
@@ -555,15 +558,13 @@ def do_pub_bias(data, options, decimal_places: int = 4, alpha: float = 0.05,  no
     based on specific options, farms out analysis to computational functions, then collects and returns
     results
     """
-    output_blocks = [["<h2>{}</h2>".format(get_text("Publication Bias"))]]
     options.norm_ci = norm_ci
-    output, all_citations = options.report_choices()
-    output_blocks.extend(output)
+    choice_blocks, all_citations = options.report_choices()
     if options.pub_bias_test == TRIM_FILL:
         (output, chart_data, analysis_values,
          citations) = MetaWinPubBiasFunctions.trim_and_fill_analysis(data, options, decimal_places, alpha, norm_ci)
     elif options.pub_bias_test == RANKCOR:
-        output, citations = MetaWinPubBiasFunctions.rank_correlation_analysis(data, options, decimal_places,
+        output, citations = MetaWinPubBiasFunctions.rank_correlation_analysis(data, options, decimal_places, alpha,
                                                                               sender=sender)
         chart_data = None
         analysis_values = None
@@ -580,8 +581,8 @@ def do_pub_bias(data, options, decimal_places: int = 4, alpha: float = 0.05,  no
         chart_data = None
         citations = []
     all_citations.extend(citations)
-    output_blocks.extend(output)
-    output_blocks.extend(create_reference_list(all_citations))
+    output_blocks = [[f"<h2>{get_text("Publication Bias")}</h2>"], *choice_blocks, *output,
+                     *create_reference_list(all_citations)]
     return output_blocks, chart_data, analysis_values
 
 
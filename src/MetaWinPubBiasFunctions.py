@@ -4,7 +4,10 @@ Publicationj bias module
 This module contains the functions for publication bias methods
 """
 
+import concurrent.futures
+import functools
 import math
+import os
 
 import numpy
 import scipy.stats
@@ -19,97 +22,212 @@ from MetaWinAnalysisFunctions import output_filtered_bad, mean_effect_var_and_q,
     median_effect, mean_effects_table
 
 
-# ---------- rank correlation analysis ----------
-def get_ranks(x):
-    return scipy.stats.rankdata(x, "average")
-
-
-def correlation(x, y):
-    n = len(x)
-    x_mean = numpy.sum(x)/n
-    y_mean = numpy.sum(y)/n
-    sum_xy = numpy.sum((x - x_mean)*(y - y_mean))
-    sum_x2 = numpy.sum(numpy.square(x - x_mean))
-    sum_y2 = numpy.sum(numpy.square(y - y_mean))
-    return sum_xy / math.sqrt(sum_x2 * sum_y2)
-
-
-def kendalls_tau(e_ranks, x_ranks):
-    n = len(e_ranks)
-    sort_data = numpy.zeros(shape=(n, 2))
-    # if there are no ties in e_ranks, sort by it, otherwise, sort by x_ranks
-    if len(numpy.unique(e_ranks)) < n:
-        sort_data[:, 0] = x_ranks
-        sort_data[:, 1] = e_ranks
-    else:
-        sort_data[:, 0] = e_ranks
-        sort_data[:, 1] = x_ranks
-    sort_data = sort_data[sort_data[:, 0].argsort()]  # sort into ascending order by first column
-    c = 0
-    for i in range(n):
-        for j in range(i + 1, n):
-            if sort_data[j, 1] > sort_data[i, 1]:
-                c += 1
-            elif sort_data[j, 1] == sort_data[i, 1]:
-                c += 0.5
-    sum_n = 4 * c - n * (n - 1)
-    # correction terms for ties
-    unique, cnts = numpy.unique(e_ranks, return_counts=True)
-    t1 = 0
-    for c in cnts:
-        if c > 1:
-            t1 += c * (c - 1)
-    unique, cnts = numpy.unique(x_ranks, return_counts=True)
-    t2 = 0
-    for c in cnts:
-        if c > 1:
-            t2 += c * (c - 1)
-
-    tau = sum_n / math.sqrt((n * (n - 1) - t1) * (n * (n - 1) - t2))
-    return tau
-
+# ---------- data preparation ----------
+def filter_pub_bias_data(data, options, use_sample_size: bool = False) -> tuple:
+    """
+    collect the valid effect sizes and variances (and, if requested and chosen, the sample sizes) from the
+    unfiltered rows of the data in a single pass
 
-def rank_correlation_analysis(data, options, decimal_places: int = 4, sender=None):
-    # filter and prepare data for analysis
-    effect_sizes = options.effect_data
-    variances = options.effect_vars
-    if options.sample_size is not None:
-        sample_sizes = options.sample_size
-        do_n = True
-    else:
-        sample_sizes = None
-        do_n = False
+    returns arrays of the effect sizes, weights (inverse variances), variances, and sample sizes (None if not
+    used), followed by lists of the labels of the rows with invalid data and of the rows that were filtered
+    """
+    e_pos = options.effect_data.position()
+    v_pos = options.effect_vars.position()
+    do_n = use_sample_size and (options.sample_size is not None)
+    if do_n:
+        n_pos = options.sample_size.position()
     e_data = []
-    w_data = []
     v_data = []
     n_data = []
     bad_data = []
-    study_names = []
     filtered = []
     for r, row in enumerate(data.rows):
         if row.not_filtered():
-            e = data.check_value(r, effect_sizes.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            v = data.check_value(r, variances.position(), value_type=MetaWinConstants.VALUE_NUMBER)
+            e = data.check_value(r, e_pos, value_type=MetaWinConstants.VALUE_NUMBER)
+            v = data.check_value(r, v_pos, value_type=MetaWinConstants.VALUE_NUMBER)
             if do_n:
-                ns = data.check_value(r, sample_sizes.position(), value_type=MetaWinConstants.VALUE_NUMBER)
+                ns = data.check_value(r, n_pos, value_type=MetaWinConstants.VALUE_NUMBER)
             else:
                 ns = 1
             if (e is not None) and (v is not None) and (v > 0) and (ns is not None) and (ns > 0):
                 e_data.append(e)
-                w_data.append(1/v)
                 v_data.append(v)
                 if do_n:
                     n_data.append(ns)
-                study_names.append(row.label)
             else:
                 bad_data.append(row.label)
         else:
             filtered.append(row.label)
-    e_data = numpy.array(e_data)
-    w_data = numpy.array(w_data)
-    v_data = numpy.array(v_data)
+    e_data = numpy.fromiter(e_data, dtype=numpy.float64, count=len(e_data))
+    v_data = numpy.fromiter(v_data, dtype=numpy.float64, count=len(v_data))
+    w_data = numpy.reciprocal(v_data)
     if do_n:
-        n_data = numpy.array(n_data)
+        n_data = numpy.fromiter(n_data, dtype=numpy.float64, count=len(n_data))
+    else:
+        n_data = None
+    return e_data, w_data, v_data, n_data, bad_data, filtered
+
+
+# ---------- rank correlation analysis ----------
+def get_ranks(x):
+    return scipy.stats.rankdata(x, "average")
+
+
+def correlation(x, y):
+    x_dev = x - numpy.mean(x)
+    y_dev = y - numpy.mean(y)
+    return numpy.dot(x_dev, y_dev) / math.sqrt(numpy.dot(x_dev, x_dev) * numpy.dot(y_dev, y_dev))
+
+
+@functools.lru_cache(maxsize=None)
+def merge_plan(n: int) -> tuple:
+    """
+    the padded row length and the per-level constants of the bottom-up merge used by count_discordant_pairs
+
+    these depend only on the number of values, so are built once for each sample size and reused by every
+    block of permutations
+    """
+    size = 1
+    while size < n:
+        size *= 2
+    levels = []
+    width = 1
+    while width < size:
+        positions = numpy.arange(2*width)
+        offsets = numpy.arange(width, 2*width)
+        positions.setflags(write=False)
+        offsets.setflags(write=False)
+        levels.append((width, positions, offsets))
+        width *= 2
+    return size, tuple(levels)
+
+
+def count_discordant_pairs(y):
+    """
+    count the number of pairs (i < j) where y[i] > y[j] within each row of the matrix y
+
+    this is the merge sort inversion count of Knight (1966), performed as a bottom-up merge so that every row
+    of the matrix is processed simultaneously
+    """
+    nrows, n = y.shape
+    size, levels = merge_plan(n)
+    # pad each row with values larger than any real value, so that the padding is never part of a discordant pair
+    merged = numpy.full((nrows, size), numpy.max(y) + 1, dtype=y.dtype)
+    merged[:, :n] = y
+    discordant = numpy.zeros(nrows, dtype=numpy.int64)
+    # every level has the same number of elements, so one buffer holds the merged positions at all levels
+    position_buffer = numpy.empty(nrows*size, dtype=numpy.intp)
+    for width, positions, offsets in levels:
+        # each block consists of two already sorted halves of length width
+        blocks = merged.reshape(nrows, size // (2*width), 2*width)
+        order = numpy.argsort(blocks, axis=2, kind="stable")
+        position = position_buffer.reshape(order.shape)
+        numpy.put_along_axis(position, order, positions, axis=2)
+        # the j-th element of the right half, found at merged position p, follows p - j elements of the left
+        # half; the remaining width - (p - j) elements of the left half are larger
+        discordant += numpy.sum(offsets - position[:, :, width:], axis=(1, 2))
+        merged = numpy.take_along_axis(blocks, order, axis=2).reshape(nrows, size)
+    return discordant
+
+
+def kendall_setup(e_ranks, x_ranks) -> tuple:
+    """
+    the parts of Kendall's tau that do not change when e_ranks is permuted
+
+    returns the distinct values of e_ranks, the order that sorts x_ranks, the integer codes of the sorted
+    x_ranks scaled so they can be combined with the codes of e_ranks into a single sort key, the number of
+    pairs not tied in either variable (ignoring pairs tied in both), and the tau-b denominator
+    """
+    n = len(x_ranks)
+    _, x_codes, x_cnts = numpy.unique(x_ranks, return_inverse=True, return_counts=True)
+    e_values, e_cnts = numpy.unique(e_ranks, return_counts=True)
+    x_order = numpy.argsort(x_codes, kind="stable")
+    x_keys = x_codes[x_order]*len(e_values)
+    n_pairs = n * (n - 1) // 2
+    x_ties = numpy.sum(x_cnts * (x_cnts - 1)) // 2
+    e_ties = numpy.sum(e_cnts * (e_cnts - 1)) // 2
+    denominator = math.sqrt((n_pairs - x_ties) * (n_pairs - e_ties))
+    return e_values, x_order, x_keys, n_pairs - x_ties - e_ties, denominator
+
+
+def kendall_score(e_codes, setup: tuple):
+    """
+    the number of concordant minus the number of discordant pairs for each row of the matrix e_codes
+
+    each row of e_codes must be a permutation of the integer codes (positions within the distinct values)
+    of the e_ranks used to create setup, with kendall_setup
+    """
+    e_values, x_order, x_keys, untied_pairs, _ = setup
+    m = len(e_values)
+    n = len(x_order)
+    # sort each row by x, breaking ties in x by e, so the discordant pairs are the inversions remaining in e
+    keys = numpy.sort(x_keys + e_codes[:, x_order], axis=1)
+    discordant = count_discordant_pairs(keys % m)
+
+    # pairs tied in both x and e share a key; count them from the start of each run of identical keys
+    index = numpy.arange(n)
+    run_start = numpy.ones(keys.shape, dtype=bool)
+    run_start[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    joint_ties = numpy.sum(index - numpy.maximum.accumulate(numpy.where(run_start, index, 0), axis=1), axis=1)
+
+    return untied_pairs + joint_ties - 2*discordant
+
+
+def kendalls_tau(e_ranks, x_ranks):
+    """
+    calculate Kendall's tau (tau-b, corrected for ties) between e_ranks and x_ranks
+
+    e_ranks may also be a matrix whose rows are permutations of the same set of ranks, in which case the
+    correlation of each row with x_ranks is returned as an array
+    """
+    rows = numpy.atleast_2d(e_ranks)
+    setup = kendall_setup(rows[0], x_ranks)
+    tau = kendall_score(numpy.searchsorted(setup[0], rows), setup) / setup[4]
+    if numpy.ndim(e_ranks) == 1:
+        return tau[0]
+    return tau
+
+
+def count_extreme_permutations(seed, nperms: int, values, cor_test: str, setup: tuple, obs_score) -> int:
+    """
+    count how many of nperms random permutations of values have a rank correlation score at least as extreme
+    as obs_score
+
+    for Kendall's tau, values are the integer codes of the effect ranks and setup is from kendall_setup; for
+    Spearman's rho, values are twice the effect ranks and setup holds twice the other ranks and the center
+    """
+    rng = numpy.random.default_rng(seed)
+    # each row is shuffled in place, so the block is only allocated once
+    rand_block = numpy.tile(values, (nperms, 1))
+    rng.permuted(rand_block, axis=1, out=rand_block)
+    if cor_test == "tau":
+        rand_scores = kendall_score(rand_block, setup)
+    else:
+        x_ranks2, center = setup
+        rand_scores = rand_block @ x_ranks2 - center
+    return int(numpy.count_nonzero(numpy.abs(rand_scores) >= obs_score))
+
+
+def randomization_p_resolved(extreme: int, nperms: int, alpha: float) -> bool:
+    """
+    whether the 99% Clopper-Pearson interval of the proportion of permutations at least as extreme as the
+    observed data lies clearly (by more than 10%) above or below alpha, in which case additional permutations
+    would not reasonably change the outcome of the test
+    """
+    if extreme > 0:
+        lower = scipy.stats.beta.ppf(0.005, extreme, nperms - extreme + 1)
+    else:
+        lower = 0
+    if extreme < nperms:
+        upper = scipy.stats.beta.ppf(0.995, extreme + 1, nperms - extreme)
+    else:
+        upper = 1
+    return (upper < 0.9*alpha) or (lower > 1.1*alpha)
+
+
+def rank_correlation_analysis(data, options, decimal_places: int = 4, alpha: float = 0.05, sender=None):
+    # filter and prepare data for analysis
+    e_data, w_data, v_data, n_data, bad_data, filtered = filter_pub_bias_data(data, options, use_sample_size=True)
 
     output_blocks = output_filtered_bad(filtered, bad_data)
 
@@ -127,12 +245,10 @@ def rank_correlation_analysis(data, options, decimal_places: int = 4, sender=Non
             mean_e, var_e, *_ = mean_effect_var_and_q(e_data, ws_data)
 
         # standardize e and v
-        v_star = [v - 1/sum_w for v in v_data]
-        e_star = [(e_data[i] - mean_e)/math.sqrt(v_star[i]) for i in range(n)]
-        v_star = numpy.array(v_star)
-        e_star = numpy.array(e_star)
+        v_star = v_data - 1/sum_w
+        e_star = (e_data - mean_e)/numpy.sqrt(v_star)
 
-        if do_n:
+        if n_data is not None:
             x_star = n_data
         else:
             x_star = v_star
@@ -140,9 +256,22 @@ def rank_correlation_analysis(data, options, decimal_places: int = 4, sender=Non
         # calculate rank correlation
         e_ranks = get_ranks(e_star)
         x_ranks = get_ranks(x_star)
+        # the scores used to compare permutations to the observed data depend on the order of the effect ranks
+        # but everything else does not, so that is calculated only once
         if options.cor_test == "tau":  # Kendall's tau
-            r = kendalls_tau(e_ranks, x_ranks)
+            # the integer codes of e_ranks are permuted in place of the ranks themselves
+            setup = kendall_setup(e_ranks, x_ranks)
+            rand_values = numpy.searchsorted(setup[0], e_ranks)
+            obs_score = kendall_score(rand_values[numpy.newaxis, :], setup)[0]
+            r = obs_score / setup[4]
         else:  # Spearman's rho
+            # twice any rank (including the average rank of ties) is an integer and the mean rank is always
+            # (n + 1)/2, so 4*sum(e*x) - n(n + 1)^2 is an exact integer proportional to rho for every permutation
+            rand_values = numpy.rint(2*e_ranks).astype(numpy.int64)
+            x_ranks2 = numpy.rint(2*x_ranks).astype(numpy.int64)
+            center = n*(n + 1)**2
+            setup = (x_ranks2, center)
+            obs_score = numpy.dot(rand_values, x_ranks2) - center
             r = correlation(e_ranks, x_ranks)
 
         # test with randomization
@@ -154,22 +283,35 @@ def rank_correlation_analysis(data, options, decimal_places: int = 4, sender=Non
         else:
             progress_bar = None
 
-        # decimal places to use for randomization-based p-value
-        rand_p_dec = max(decimal_places, math.ceil(math.log10(nreps+1)))
         cnt_r = 1
-        rng = numpy.random.default_rng()
-        for rep in range(nreps):
-            rand_e_ranks = rng.permutation(e_ranks)
-            if options.cor_test == "tau":
-                rand_r = kendalls_tau(rand_e_ranks, x_ranks)
-            else:
-                rand_r = correlation(e_ranks, x_ranks)
-            if abs(rand_r) >= abs(r):
-                cnt_r += 1
-            if progress_bar is not None:
-                progress_bar.setValue(progress_bar.value() + 1)
+        # permutations are evaluated in blocks, one permutation per row, which bounds memory use, spreads the
+        # work across the available processors (numpy releases the GIL while sorting and multiplying), and
+        # still allows the progress bar to be updated. Each block has its own independent random stream
+        n_workers = os.cpu_count() or 1
+        block_size = max(1, min(1000, 2**20 // n, math.ceil(nreps / n_workers)))
+        blocks = [min(block_size, nreps - rep) for rep in range(0, nreps, block_size)]
+        seeds = numpy.random.SeedSequence().spawn(len(blocks))
+
+        # once at least 1000 permutations have been evaluated, stop early if the probability is clearly
+        # above or below alpha
+        rep = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = {executor.submit(count_extreme_permutations, seed, block, rand_values, options.cor_test,
+                                       setup, abs(obs_score)): block for seed, block in zip(seeds, blocks)}
+            for future in concurrent.futures.as_completed(futures):
+                cnt_r += future.result()
+                rep += futures[future]
+                if progress_bar is not None:
+                    progress_bar.setValue(rep)
+                if (1000 <= rep < nreps) and randomization_p_resolved(cnt_r - 1, rep, alpha):
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+        if progress_bar is not None:
+            progress_bar.setValue(nreps)
 
-        p_random = cnt_r / (nreps + 1)
+        # decimal places to use for randomization-based p-value
+        rand_p_dec = max(decimal_places, math.ceil(math.log10(rep+1)))
+        p_random = cnt_r / (rep + 1)
         p_random_str = format(p_random, inline_float(rand_p_dec))
         rstr = format(r, inline_float(decimal_places))
 
@@ -180,6 +322,8 @@ def rank_correlation_analysis(data, options, decimal_places: int = 4, sender=Non
         else:
             output = ["Spearman's &rho; = {}".format(rstr)]
         output.append("Probability = {}".format(p_random_str))
+        if rep < nreps:
+            output.append(get_text("randomization_early_stop").format(rep, alpha))
         output_blocks.append(output)
         citations.append("Sokal_Rohlf_1995")
 
@@ -193,29 +337,7 @@ def rank_correlation_analysis(data, options, decimal_places: int = 4, sender=Non
 def trim_and_fill_analysis(data, options, decimal_places: int = 4, alpha: float = 0.05, norm_ci: bool = True):
     # filter and prepare data for analysis
     effect_sizes = options.effect_data
-    variances = options.effect_vars
-    e_data = []
-    w_data = []
-    v_data = []
-    bad_data = []
-    study_names = []
-    filtered = []
-    for r, row in enumerate(data.rows):
-        if row.not_filtered():
-            e = data.check_value(r, effect_sizes.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            v = data.check_value(r, variances.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            if (e is not None) and (v is not None) and (v > 0):
-                e_data.append(e)
-                w_data.append(1/v)
-                v_data.append(v)
-                study_names.append(row.label)
-            else:
-                bad_data.append(row.label)
-        else:
-            filtered.append(row.label)
-    e_data = numpy.array(e_data)
-    w_data = numpy.array(w_data)
-    v_data = numpy.array(v_data)
+    e_data, w_data, v_data, _, bad_data, filtered = filter_pub_bias_data(data, options)
 
     output_blocks = output_filtered_bad(filtered, bad_data)
 
@@ -246,6 +368,14 @@ def trim_and_fill_analysis(data, options, decimal_places: int = 4, alpha: float
                                              lower_ci, upper_ci, 0, 0, 0, 0)
         original_mean = mean_e
 
+        # sort the data once, into descending order by effect size; ascending order is simply the reverse
+        order = e_data.argsort()[::-1]
+        sort_data = numpy.zeros(shape=(n, 3))
+        sort_data[:, 0] = e_data[order]
+        sort_data[:, 1] = w_data[order]
+        sort_data[:, 2] = v_data[order]
+        rank_values = numpy.arange(1, n+1)
+
         trim_n = -1
         new_trim = 0
         iterations = 0
@@ -254,14 +384,10 @@ def trim_and_fill_analysis(data, options, decimal_places: int = 4, alpha: float
         while (trim_n != new_trim) and (iterations < 1000):
             iterations += 1
             trim_n = new_trim
-            tmp_data = numpy.zeros(shape=(n, 3))
-            tmp_data[:, 0] = e_data
-            tmp_data[:, 1] = w_data
-            tmp_data[:, 2] = v_data
             if skew_right:
-                tmp_data = tmp_data[tmp_data[:, 0].argsort()[::-1]]  # sort into descending order by first column
+                tmp_data = sort_data
             else:
-                tmp_data = tmp_data[tmp_data[:, 0].argsort()]  # sort into ascending order by first column
+                tmp_data = sort_data[::-1]
 
             # trim the first trim_n rows
             trim_data = tmp_data[trim_n:, :]
@@ -276,13 +402,15 @@ def trim_and_fill_analysis(data, options, decimal_places: int = 4, alpha: float
 
             # using this new mean, calculate the thresholds for all of the data
             diff = tmp_data[:, 0] - tmp_mean_e
-            abs_diff = numpy.abs(diff)
-            ranks = abs_diff.argsort().argsort()
-            ranks = (ranks+1)*numpy.sign(diff)
-            pos = [r > 0 for r in ranks]
-            neg = [r < 0 for r in ranks]
-            t_pos = numpy.sum(ranks[pos])
-            t_neg = numpy.sum(numpy.abs(ranks[neg]))
+            # rank the absolute differences by inverting their sort order, then sign them
+            ranks = numpy.empty(n)
+            ranks[numpy.abs(diff).argsort()] = rank_values
+            ranks *= numpy.sign(diff)
+            # the positive and negative rank sums follow from the sums of the signed and absolute ranks
+            signed_sum = numpy.sum(ranks)
+            abs_sum = numpy.sum(numpy.abs(ranks))
+            t_pos = (abs_sum + signed_sum) / 2
+            t_neg = (abs_sum - signed_sum) / 2
             if t_pos > t_neg:  # right skew
                 gamma = n - abs(numpy.min(ranks))
                 t_n = t_pos
@@ -298,23 +426,12 @@ def trim_and_fill_analysis(data, options, decimal_places: int = 4, alpha: float
                 new_trim = max(0, round((4*t_n - n*(n+1))/(2*n - 1)))
 
         # create the new data set with the estimated missing values
-        sort_data = numpy.zeros(shape=(n, 3))
-        sort_data[:, 0] = e_data
-        sort_data[:, 1] = w_data
-        sort_data[:, 2] = v_data
-        if skew_right:
-            sort_data = sort_data[sort_data[:, 0].argsort()[::-1]]  # sort into descending order by first column
-        else:
-            sort_data = sort_data[sort_data[:, 0].argsort()]  # sort into ascending order by first column
+        if not skew_right:
+            sort_data = sort_data[::-1]
         tmp_data = numpy.zeros(shape=(n+trim_n, 3))
-        tmp_data[:n, 0] = sort_data[:, 0]
-        tmp_data[:n, 1] = sort_data[:, 1]
-        tmp_data[:n, 2] = sort_data[:, 2]
-        for i in range(trim_n):
-            d = tmp_data[i, 0] - tmp_mean_e
-            tmp_data[n+i, 0] = tmp_mean_e - d
-            tmp_data[n+i, 1] = tmp_data[i, 1]
-            tmp_data[n+i, 2] = tmp_data[i, 2]
+        tmp_data[:n, :] = sort_data
+        tmp_data[n:, 0] = tmp_mean_e - (sort_data[:trim_n, 0] - tmp_mean_e)
+        tmp_data[n:, 1:] = sort_data[:trim_n, 1:]
 
         # calculate the new mean, etc.
         mean_e, var_e, qt, sum_w, sum_w2, _ = mean_effect_var_and_q(tmp_data[:, 0], tmp_data[:, 1])
@@ -351,44 +468,7 @@ def trim_and_fill_analysis(data, options, decimal_places: int = 4, alpha: float
 def funnel_plot_setup(data, options):
     # filter and prepare data for analysis
     effect_sizes = options.effect_data
-    variances = options.effect_vars
-    if options.sample_size is not None:
-        sample_sizes = options.sample_size
-        do_n = True
-    else:
-        sample_sizes = None
-        do_n = False
-
-    e_data = []
-    w_data = []
-    v_data = []
-    n_data = []
-    bad_data = []
-    study_names = []
-    filtered = []
-
-    for r, row in enumerate(data.rows):
-        if row.not_filtered():
-            e = data.check_value(r, effect_sizes.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            v = data.check_value(r, variances.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            if do_n:
-                ns = data.check_value(r, sample_sizes.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            else:
-                ns = 1
-            if (e is not None) and (v is not None) and (v > 0) and (ns is not None) and (ns > 0):
-                e_data.append(e)
-                w_data.append(1/v)
-                v_data.append(v)
-                if do_n:
-                    n_data.append(ns)
-                study_names.append(row.label)
-            else:
-                bad_data.append(row.label)
-        else:
-            filtered.append(row.label)
-    e_data = numpy.array(e_data)
-    w_data = numpy.array(w_data)
-    v_data = numpy.array(v_data)
+    e_data, w_data, v_data, n_data, bad_data, filtered = filter_pub_bias_data(data, options, use_sample_size=True)
 
     if options.funnel_y == "variance":
         y_data = v_data
@@ -399,7 +479,7 @@ def funnel_plot_setup(data, options):
     elif options.funnel_y == "precision":
         y_data = 1/numpy.sqrt(v_data)
     else:
-        y_data = numpy.array(n_data)
+        y_data = n_data
 
     output_blocks = output_filtered_bad(filtered, bad_data)
 
@@ -426,30 +506,7 @@ def funnel_plot_setup(data, options):
 # ---------- Egger regression ----------
 def egger_regression(data, options, decimal_places: int = 4, alpha: float = 0.05, norm_ci: bool = True):
     # filter and prepare data for analysis
-    effect_sizes = options.effect_data
-    variances = options.effect_vars
-    e_data = []
-    w_data = []
-    v_data = []
-    bad_data = []
-    study_names = []
-    filtered = []
-    for r, row in enumerate(data.rows):
-        if row.not_filtered():
-            e = data.check_value(r, effect_sizes.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            v = data.check_value(r, variances.position(), value_type=MetaWinConstants.VALUE_NUMBER)
-            if (e is not None) and (v is not None) and (v > 0):
-                e_data.append(e)
-                w_data.append(1/v)
-                v_data.append(v)
-                study_names.append(row.label)
-            else:
-                bad_data.append(row.label)
-        else:
-            filtered.append(row.label)
-    e_data = numpy.array(e_data)
-    w_data = numpy.array(w_data)
-    v_data = numpy.array(v_data)
+    e_data, w_data, v_data, _, bad_data, filtered = filter_pub_bias_data(data, options)
 
     output_blocks = output_filtered_bad(filtered, bad_data)
 
@@ -1,6 +1,13 @@
 """
 Module containing the class associated with storing and manipulating phylogenetic trees
 """
+import re
+from typing import Tuple
+
+import numpy
+
+
+NEWICK_DELIMITERS = re.compile(r"[(),;]")
 
 
 class Node:
@@ -8,13 +15,23 @@ class Node:
     A class which represents a single node of a phylgenetic tree
 
     The class works by hierarchically by pointing to other nodes, either as ancestor or as a set of descendants.
+
+    Summaries of the subtree descended from a node (number of tips, maximum tip length, tip names, an index of
+    node names) are cached when first calculated, and discarded whenever a name, branch length, or descendant
+    changes within the subtree.
     """
 
+    __slots__ = ("__name", "__branch_length", "ancestor", "descendants", "__cache", "__in_cached_subtree")
+
     def __init__(self):
         self.__name = ""
         self.__branch_length = 1
-        self.__ancestor = None
-        self.__descendants = list()
+        self.ancestor = None
+        self.descendants = list()
+        self.__cache = {}
+        self.__in_cached_subtree = False
+
+    # the name and branch length remain properties because changing either invalidates cached summaries
 
     @property
     def name(self):
@@ -23,6 +40,7 @@ class Node:
     @name.setter
     def name(self, value):
         self.__name = value
+        self.clear_cache()
 
     @property
     def branch_length(self):
@@ -34,18 +52,7 @@ class Node:
     @branch_length.setter
     def branch_length(self, value):
         self.__branch_length = value
-
-    @property
-    def descendants(self):
-        return self.__descendants
-
-    @property
-    def ancestor(self):
-        return self.__ancestor
-
-    @ancestor.setter
-    def ancestor(self, value):
-        self.__ancestor = value
+        self.clear_cache()
 
     def add_child(self, new_child):
         """
@@ -53,6 +60,21 @@ class Node:
         """
         self.descendants.append(new_child)
         new_child.ancestor = self
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        """
+        discard the cached summaries which may depend on this node, i.e., those of the node and its ancestors
+
+        nothing needs to be done if no summary including this node has been calculated since it was last
+        cleared, which keeps building a tree node by node fast
+        """
+        if self.__in_cached_subtree:
+            node = self
+            while node is not None:
+                node.__cache.clear()
+                node = node.ancestor
+            self.__in_cached_subtree = False
 
     def n_descendants(self) -> int:
         """
@@ -64,22 +86,34 @@ class Node:
         """
         find and return the node representing the root of the tree
         """
-        if self.ancestor is None:
-            return self
-        else:
-            return self.ancestor.root()
+        node = self
+        while node.ancestor is not None:
+            node = node.ancestor
+        return node
+
+    def preorder(self):
+        """
+        iterate over this node and all of its descendants in pre-order (each node before its descendants, and
+        descendants in left-to-right order)
+
+        the traversal uses an explicit stack, so is not limited by the depth of the tree
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.descendants))
 
     def is_descendant(self, query) -> bool:
         """
         is the query node a descendant of the calling node
         """
-        result = False
-        for d in self.descendants:
-            if d == query:
-                result = True
-            elif d.is_descendant(query):
-                result = True
-        return result
+        node = query.ancestor
+        while node is not None:
+            if node is self:
+                return True
+            node = node.ancestor
+        return False
 
     def is_sibling(self, query) -> bool:
         """
@@ -91,13 +125,19 @@ class Node:
         """
         number of tips descended from this node, including itself
         """
-        if self.n_descendants() == 0:
-            return 1
-        else:
-            count = 0
-            for d in self.descendants:
-                count += d.n_tips()
-            return count
+        if "n_tips" not in self.__cache:
+            # reversing the pre-order visits every node after all of its descendants, so the count for every
+            # node of the subtree is cached along the way
+            for node in reversed(list(self.preorder())):
+                if node.n_descendants() == 0:
+                    count = 1
+                else:
+                    count = 0
+                    for d in node.descendants:
+                        count += d.__cache["n_tips"]
+                node.__cache["n_tips"] = count
+                node.__in_cached_subtree = True
+        return self.__cache["n_tips"]
 
     def distance_to_ancestor(self, query) -> float:
         """
@@ -120,8 +160,14 @@ class Node:
         if query.is_descendant(self):
             return query
         else:
+            # collect the lineage of the query once, rather than searching the subtree of every candidate
+            query_ancestors = set()
+            node = query.ancestor
+            while node is not None:
+                query_ancestors.add(node)
+                node = node.ancestor
             common_anc = self
-            while not common_anc.is_descendant(query):
+            while common_anc not in query_ancestors:
                 common_anc = common_anc.ancestor
             return common_anc
 
@@ -142,59 +188,85 @@ class Node:
         """
         find the longest distance between a node and its most distance descendant
         """
-        long = 0
-        for d in self.descendants:
-            long = max(long, d.max_node_tip_length())
-        return long + self.branch_length
+        if "max_node_tip_length" not in self.__cache:
+            # reversing the pre-order visits every node after all of its descendants, so the length for every
+            # node of the subtree is cached along the way
+            for node in reversed(list(self.preorder())):
+                long = 0
+                for d in node.descendants:
+                    long = max(long, d.__cache["max_node_tip_length"])
+                node.__cache["max_node_tip_length"] = long + node.branch_length
+                node.__in_cached_subtree = True
+        return self.__cache["max_node_tip_length"]
 
     def max_node_name(self) -> int:
         """
         find the longest name associated with a node and its descendants
         """
-        long = len(self.name)
-        for d in self.descendants:
-            long = max(long, d.max_node_name())
-        return long
+        return max(len(node.name) for node in self.preorder())
 
     def tip_names(self) -> list:
         """
         return a list of all tip names associated with a node
         """
-        names = []
-        if self.n_descendants() == 0:
-            names.append(self.name)
-        else:
-            for d in self.descendants:
-                names.extend(d.tip_names())
-        return names
+        if "tip_names" not in self.__cache:
+            names = []
+            for node in self.preorder():
+                if node.n_descendants() == 0:
+                    names.append(node.name)
+                node.__in_cached_subtree = True
+            self.__cache["tip_names"] = names
+        return list(self.__cache["tip_names"])
 
     def tip_nodes(self) -> list:
         """
         return a list of all tip nodes associated with a node
         """
-        tips = []
-        if self.n_descendants() == 0:
-            tips.append(self)
-        else:
-            for d in self.descendants:
-                tips.extend(d.tip_nodes())
-        return tips
+        return [node for node in self.preorder() if node.n_descendants() == 0]
 
     def newick_recursion(self, bl_format: str = "0.4f") -> str:
         """
          This function will output the tree in the Newick format. If bl_format is not an empty string
          it will include branch lengths in the format specified by the bl_format string.
         """
-        if self.n_descendants() == 0:
-            outstr = self.name
-        else:
-            outlist = []
-            for d in self.descendants:
-                outlist.append(d.newick_recursion(bl_format))
-            outstr = "(" + ",".join(outlist) + ")"
-        if bl_format != "":
-            outstr += ":" + format(self.branch_length, bl_format)
-        return outstr
+        # the stack holds nodes still to be written and the punctuation which follows them; each piece of the
+        # string is written once, in order, and joined at the end
+        pieces = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                pieces.append(node)
+                continue
+            if bl_format != "":
+                branch_length = ":" + format(node.branch_length, bl_format)
+            else:
+                branch_length = ""
+            if node.n_descendants() == 0:
+                pieces.append(node.name + branch_length)
+            else:
+                pieces.append("(")
+                stack.append(")" + branch_length)
+                for i, d in enumerate(reversed(node.descendants)):
+                    if i > 0:
+                        stack.append(",")
+                    stack.append(d)
+        return "".join(pieces)
+
+    def to_arrays(self) -> Tuple[list, numpy.ndarray, numpy.ndarray]:
+        """
+        flatten the subtree into pre-order arrays, for calculations which need to visit many nodes many times
+
+        returns the list of nodes, the position within that list of the ancestor of each node (-1 for this node),
+        and the branch length of each node
+        """
+        nodes = list(self.preorder())
+        index = {node: i for i, node in enumerate(nodes)}
+        parent = numpy.full(len(nodes), -1)
+        for i in range(1, len(nodes)):
+            parent[i] = index[nodes[i].ancestor]
+        branch_lengths = numpy.array([node.branch_length for node in nodes], dtype=float)
+        return nodes, parent, branch_lengths
 
     def output_newick(self, bl_format: str = "0.4f") -> str:
         """
@@ -205,53 +277,61 @@ class Node:
     def find_tip_by_name(self, query: str):
         """
         find and return the node with the queried name
-        """
-        if self.name == query:
-            return self
-        else:
-            for d in self.descendants:
-                x = d.find_tip_by_name(query)
-                if x is not None:
-                    return x
-        return None
+
+        the first time this is called, an index of the names of all nodes of the subtree is cached, so later
+        searches do not need to traverse the tree
+        """
+        if "name_index" not in self.__cache:
+            name_index = {}
+            for node in self.preorder():
+                name_index.setdefault(node.name, node)  # keep the first match in pre-order
+                node.__in_cached_subtree = True
+            self.__cache["name_index"] = name_index
+        return self.__cache["name_index"].get(query)
+
+
+def read_newick_label(node: Node, label: str) -> None:
+    """
+    assign the name and/or branch length found between two Newick delimiters to a node
+    """
+    if ":" not in label:  # just a name
+        node.name = label
+    elif label[0] == ":":  # just a branch length
+        node.branch_length = float(label[1:])
+    else:  # a name and branch length combined
+        new_name, new_bl = label.split(":")
+        node.name = new_name.strip()
+        node.branch_length = float(new_bl)
 
 
 def read_newick_tree(tree_str) -> Node:
     """
     Translate a string representing a tree in Newick format into the internal tree structure and return the
     node representing the root.
+
+    The string is scanned once, jumping from delimiter to delimiter; anything found between two delimiters is
+    a node name and/or branch length. A ValueError is raised if the string does not end with a semicolon or
+    contains a branch length which is not a number.
     """
-    symbols = "(),;"
-    i = 0
+    start = 0
     current_node = Node()
-    while tree_str[i] != ";":
-        if tree_str[i] == "(":
+    for delimiter in NEWICK_DELIMITERS.finditer(tree_str):
+        end = delimiter.start()
+        if end > start:
+            read_newick_label(current_node, tree_str[start:end])
+        symbol = delimiter.group()
+        if symbol == ";":
+            return current_node.root()
+        elif symbol == "(":
             new_node = Node()
             current_node.add_child(new_node)
             current_node = new_node
-        elif tree_str[i] == ",":
+        elif symbol == ",":
             current_node = current_node.ancestor
             new_node = Node()
             current_node.add_child(new_node)
             current_node = new_node
-        elif tree_str[i] == ")":
-            if current_node.ancestor is not None:
-                current_node = current_node.ancestor
-        else:  # must be a name and/or a branch length
-            j = i
-            while not tree_str[j] in symbols:
-                j += 1
-            sub_str = tree_str[i:j]
-            if ":" not in sub_str:  # just a name
-                current_node.name = sub_str
-            elif sub_str[0] == ":":  # just a branch length
-                bl = eval(sub_str[1:].strip())
-                current_node.branch_length = bl
-            else:  # a name and branch length combined
-                new_name, new_bl = sub_str.split(":")
-                current_node.name = new_name.strip()
-                current_node.branch_length = eval(new_bl.strip())
-            i = j - 1
-        i += 1
-    root_node = current_node.root()
-    return root_node
+        elif current_node.ancestor is not None:  # symbol == ")"
+            current_node = current_node.ancestor
+        start = end + 1
+    raise ValueError("Newick tree is missing the terminating semicolon")
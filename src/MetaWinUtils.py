@@ -3,10 +3,13 @@ Module with a number of general utility functions
 """
 
 from typing import Optional, Union, Tuple
+import functools
+import itertools
 import re
 import urllib.request
 import math
 
+import scipy.special
 import scipy.stats
 import numpy
 
@@ -14,6 +17,10 @@ import MetaWinConstants
 from MetaWinLanguage import get_text
 
 
+HTML_TAG = re.compile(r"<.+?>")
+
+
+@functools.lru_cache(maxsize=32)
 def inline_float(decimal_places: int) -> str:
     """
     format a floating-point number displayed within inline text with the desired number of decimal places
@@ -28,9 +35,9 @@ def format_number(number, width: int = 0, decimals: int = 2) -> str:
     if the number is an integer, format it as such, otherwise, format it as a floating point number
     """
     if isinstance(number, int):
-        return format(number, "{}d".format(width))
+        return format(number, f"{width}d")
     else:
-        return format(number, "{}.{}f".format(width, decimals))
+        return format(number, f"{width}.{decimals}f")
 
 
 def interval_to_str(lower_value, upper_value, decimal_places: int = 4) -> str:
@@ -50,8 +57,7 @@ def strip_html(x: str) -> str:
     """
     remove any stray html tags from within string
     """
-    regex = r"<.+?>"
-    return re.sub(regex, "", x)
+    return HTML_TAG.sub("", x)
 
 
 def create_output_table(output_text: list, table_data: list, col_headers: list, col_formats: list,
@@ -75,15 +81,14 @@ def create_output_table(output_text: list, table_data: list, col_headers: list,
     :param line_after: add an extra line of hyphens after each row number in the list, if present
     """
     # determine maximum width for each column
-    max_width = [len(strip_html(h)) for h in col_headers]
+    float_format = inline_float(out_dec)
+    cell_formats = [float_format if f == "f" else f for f in col_formats]
+    stripped_headers = [strip_html(h) for h in col_headers]
+    max_width = [len(h) for h in stripped_headers]
     for row in table_data:
         for i, x in enumerate(row):
-            if col_formats[i] == "f":
-                frmt = "0.{}f".format(out_dec)
-            else:
-                frmt = col_formats[i]
             if x is not None:
-                max_width[i] = max(max_width[i], len(format(x, frmt)))
+                max_width[i] = max(max_width[i], len(format(x, cell_formats[i])))
 
     col_spacer = " "*sbc
 
@@ -93,8 +98,8 @@ def create_output_table(output_text: list, table_data: list, col_headers: list,
         html tags mess up the automatic centering, so when they exist, manually add spaces on either end of the
         header to account for this
         """
-        if len(h) > len(strip_html(h)):
-            e = max_width[i] - len(strip_html(h))
+        if len(h) > len(stripped_headers[i]):
+            e = max_width[i] - len(stripped_headers[i])
             ladj, radj = math.floor(e/2), math.ceil(e/2)
             col_headers[i] = " " * ladj + h + " " * radj
     cols = [format(h, "^{}".format(max_width[i])) for i, h in enumerate(col_headers)]
@@ -103,33 +108,37 @@ def create_output_table(output_text: list, table_data: list, col_headers: list,
     header_line_width = sum(max_width) + (len(cols)-1)*sbc
     output_text.append("-"*header_line_width)
 
-    # create table data template
+    # create table data template; the rows are filled with %-formatting, which is faster than str.format for rows
+    # of many small fields
     cols = []
     total_width = 0
     for i, f in enumerate(col_formats):
         if i == 0:
-            j = "<"  # left justify first column
+            j = "-"  # left justify first column
         else:
-            j = ">"
+            j = ""
         if f == "f":
-            frmt = "{{:{}{}.{}f}}".format(j, max_width[i], out_dec)
+            frmt = "%{}{}.{}f".format(j, max_width[i], out_dec)
+        elif f == "":
+            frmt = "%{}{}s".format(j, max_width[i])
         else:
-            frmt = "{{:{}{}{}}}".format(j, max_width[i], f)
+            frmt = "%{}{}{}".format(j, max_width[i], f)
         total_width += max_width[i]
         cols.append(frmt)
     template = col_spacer.join(cols)
     total_width += (len(col_formats) - 1) * sbc
     col_2_to_n_width = total_width - sbc - max_width[0]
+    error_label = ">{}".format(max_width[0])
+    error_text = col_spacer + format(error_msg, "^{}".format(col_2_to_n_width))
 
     # create table data
     if error_row is None:
         error_row = [False for _ in table_data]
     for r, row in enumerate(table_data):
         if error_row[r]:
-            output_text.append(format(row[0], ">{}".format(max_width[0])) + col_spacer +
-                               format(error_msg, "^{}".format(col_2_to_n_width)))
+            output_text.append(format(row[0], error_label) + error_text)
         else:
-            output_text.append(template.format(*row))
+            output_text.append(template % tuple(row))
         if line_after is not None:
             if r in line_after:
                 output_text.append("-"*header_line_width)
@@ -139,6 +148,7 @@ def create_output_table(output_text: list, table_data: list, col_headers: list,
     output_text[len(output_text)-1] = output_text[len(output_text)-1] + "</pre></code>"
 
 
+@functools.lru_cache(maxsize=None)
 def get_citation(ref: str) -> str:
     """
     Retrieve the citation for a reference based on the internal cite key
@@ -146,6 +156,7 @@ def get_citation(ref: str) -> str:
     return MetaWinConstants.references[ref][1]
 
 
+@functools.lru_cache(maxsize=None)
 def get_reference(cite: str) -> str:
     """
     Retrieve the full formatted reference based on the internal cite key
@@ -191,8 +202,8 @@ def prob_z_score(z: float) -> float:
     """
     this function returns the two-tailed probability of a z-score (normal distribution)
     """
-    p = scipy.stats.norm.cdf(abs(z))
-    return (1-p)*2
+    # the two-tailed normal probability is exactly erfc(|z|/√2), and is accurate even far out in the tails
+    return math.erfc(abs(z) / math.sqrt(2))
 
 
 def prob_t_score(t: float, df: int) -> float:
@@ -203,15 +214,27 @@ def prob_t_score(t: float, df: int) -> float:
     return (1-p)*2
 
 
-def get_webpage(url: str, encoding: str = "utf-8") -> list:
+def prob_chi2(q: float, df: int) -> float:
+    """
+    this function returns the upper-tail probability of a chi-square value with df degrees of freedom
+    """
+    # chdtrc is the chi-square survival function without the overhead of the scipy.stats distribution
+    # machinery; the guards keep the old 1 - cdf results for q <= 0 and for df <= 0
+    if df <= 0:
+        return math.nan
+    if q <= 0:
+        return 1.0
+    return float(scipy.special.chdtrc(df, q))
+
+
+def get_webpage(url: str, encoding: str = "utf-8", max_lines: Optional[int] = None) -> list:
     """
     function to fetch the webpage specified by url and  return a list containing the contents of the page
+
+    the page is read and decoded line by line; if max_lines is given, reading stops after that many lines
     """
-    webpage = urllib.request.urlopen(url)
-    page = webpage.read()
-    page = page.decode(encoding)
-    lines = page.split("\n")
-    return lines
+    with urllib.request.urlopen(url) as webpage:
+        return [line.decode(encoding).rstrip("\n") for line in itertools.islice(webpage, max_lines)]
 
 
 def check_version() -> Optional[str]:
@@ -224,7 +247,7 @@ def check_version() -> Optional[str]:
     url = "https://www.metawinsoft.com/current_release_version.txt"
     newer_version = False
     try:
-        page = get_webpage(url, encoding)
+        page = get_webpage(url, encoding, max_lines=1)
         major, minor, patch, label = page[0].strip().split(".")
         major, minor, patch = int(major), int(minor), int(patch)
         if major > MetaWinConstants.MAJOR_VERSION:
@@ -235,8 +258,7 @@ def check_version() -> Optional[str]:
                 (patch > MetaWinConstants.PATCH_VERSION):
             newer_version = True
         if newer_version:
-            msg = get_text("Currently running") + " " + version_str() + "\n\n" + \
-                  get_text("Version") + " {}.{}.{}".format(major, minor, patch)
+            msg = f"{get_text('Currently running')} {version_str()}\n\n{get_text('Version')} {major}.{minor}.{patch}"
             if label.strip() != "":
                 msg += " " + label
             msg += " " + get_text("available")
@@ -250,8 +272,8 @@ def version_str() -> str:
     """
     standardized text for reporting metawin version
     """
-    return "{} {}.{}.{}".format(get_text("Version"), MetaWinConstants.MAJOR_VERSION, MetaWinConstants.MINOR_VERSION,
-                                MetaWinConstants.PATCH_VERSION)
+    return (f"{get_text('Version')} {MetaWinConstants.MAJOR_VERSION}.{MetaWinConstants.MINOR_VERSION}."
+            f"{MetaWinConstants.PATCH_VERSION}")
 
 
 def calculate_regression(x: numpy.array, y: numpy.array) -> Tuple[float, float, float, float]:
@@ -259,19 +281,19 @@ def calculate_regression(x: numpy.array, y: numpy.array) -> Tuple[float, float,
     Basic linear regression of y vs x, returning slope and intercept
     """
     n = len(x)
-    sum_y = numpy.sum(y)
-    sum_x = numpy.sum(x)
-    mean_y = sum_y/n
-    mean_x = sum_x/n
-    sum_x2 = numpy.sum(numpy.square(x))
-    sum_y2 = numpy.sum(numpy.square(y))
-    sum_xy = numpy.sum(x*y)
-    slope = (n*sum_xy - sum_x*sum_y)/(n*sum_x2 - sum_x**2)
+    mean_x = numpy.mean(x)
+    mean_y = numpy.mean(y)
+    # working from deviations avoids the loss of precision of subtracting large raw sums of squares
+    dev_x = x - mean_x
+    dev_y = y - mean_y
+    ss_x = numpy.dot(dev_x, dev_x)
+    sp_xy = numpy.dot(dev_x, dev_y)
+    slope = sp_xy/ss_x
     intercept = mean_y - slope*mean_x
 
-    s2error = (n*sum_y2 - sum_y**2 - (slope**2)*(n*sum_x2 - sum_x**2))/(n*(n-2))
-    s2slope = n*s2error/(n*sum_x2 - sum_x**2)
-    s2intercept = s2slope*sum_x2/n
+    s2error = (numpy.dot(dev_y, dev_y) - slope*sp_xy)/(n-2)
+    s2slope = s2error/ss_x
+    s2intercept = s2slope*(ss_x/n + mean_x**2)
 
     return slope, intercept, s2slope, s2intercept
 
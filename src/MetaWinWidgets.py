@@ -3,6 +3,7 @@ Module containing visual widgets which may be used across multiple dialogs
 """
 
 from typing import Optional
+import functools
 
 from PyQt6.QtWidgets import QPushButton, QVBoxLayout, QHBoxLayout, QListWidget, QAbstractItemView, QListWidgetItem, \
     QLabel, QComboBox, QCheckBox, QGroupBox, QGridLayout, QLineEdit, QColorDialog, QProgressDialog
@@ -13,6 +14,22 @@ import MetaWinConstants
 from MetaWinLanguage import get_text
 
 
+@functools.lru_cache(maxsize=None)
+def cached_icon(icon_file: str) -> QIcon:
+    """
+    Load an icon file the first time it is requested and share the result among all later widgets
+    """
+    return QIcon(icon_file)
+
+
+@functools.lru_cache(maxsize=None)
+def shared_double_validator(bottom: float, top: float, decimals: int) -> QDoubleValidator:
+    """
+    Return a single validator for each range, shared by all of the line edits which use that range
+    """
+    return QDoubleValidator(bottom, top, decimals)
+
+
 class DragDropList(QListWidget):
     """
     A specialized QListWidget designed for drag-and-drop of entries among multiple instances of this
@@ -28,9 +45,11 @@ class DragDropList(QListWidget):
 
     def dropEvent(self, drop_event):
         source = drop_event.source()
-        items = source.selectedItems()
-        for i in items:
-            source.takeItem(source.indexFromItem(i).row())
+        # take the items from the bottom up so the rows still to be taken do not shift, then add them in their
+        # original order
+        rows = sorted((source.row(i) for i in source.selectedItems()), reverse=True)
+        taken = [source.takeItem(r) for r in rows]
+        for i in reversed(taken):
             self.addItem(i)
 
 
@@ -76,7 +95,7 @@ def add_ok_button(sender) -> QPushButton:
     """
     Create an Ok button
     """
-    ok_button = QPushButton(QIcon(MetaWinConstants.ok_icon), get_text("Ok"))
+    ok_button = QPushButton(cached_icon(MetaWinConstants.ok_icon), get_text("Ok"))
     ok_button.clicked.connect(sender.accept)
     return ok_button
 
@@ -85,7 +104,7 @@ def add_cancel_button(sender) -> QPushButton:
     """
     Create a Cancel button
     """
-    cancel_button = QPushButton(QIcon(MetaWinConstants.cancel_icon), get_text("Cancel"))
+    cancel_button = QPushButton(cached_icon(MetaWinConstants.cancel_icon), get_text("Cancel"))
     cancel_button.clicked.connect(sender.reject)
     return cancel_button
 
@@ -94,7 +113,7 @@ def add_help_button(sender) -> QPushButton:
     """
     Create a Help button and connect it to the show_help function in the standard dialog
     """
-    help_button = QPushButton(QIcon(MetaWinConstants.help_icon), get_text("Help"))
+    help_button = QPushButton(cached_icon(MetaWinConstants.help_icon), get_text("Help"))
     help_button.clicked.connect(sender.show_help)
     return help_button
 
@@ -166,14 +185,14 @@ def add_effect_choice_to_dialog(sender, data, last_effect: Optional = None, last
     sender.effect_size_box = QComboBox()
     sender.variance_box = QComboBox()
     sender.columns = data.cols
+    sender.column_labels = data.column_labels()
     if include_log:
         sender.log_transform_box = QCheckBox(get_text("Log Transformed Measure"))
         if last_effect is not None:
             if last_effect.log_transformed():
                 sender.log_transform_box.setChecked(True)
-    for col in sender.columns:
-        sender.effect_size_box.addItem(col.label)
-        sender.variance_box.addItem(col.label)
+    sender.effect_size_box.addItems(sender.column_labels)
+    sender.variance_box.addItems(sender.column_labels)
     if last_effect is not None:
         if last_var is None:
             last_var = last_effect.effect_var
@@ -214,7 +233,7 @@ def add_chart_line_width(title, linewidth):
     label = QLabel(title)
     width_box = QLineEdit()
     width_box.setText(str(linewidth))
-    width_box.setValidator(QDoubleValidator(0, 20, 3))
+    width_box.setValidator(shared_double_validator(0, 20, 3))
     return width_box, label
 
 
@@ -222,15 +241,14 @@ def add_chart_marker_size(title, size):
     label = QLabel(title)
     size_box = QLineEdit()
     size_box.setText(str(size))
-    size_box.setValidator(QDoubleValidator(0, 1000, 3))
+    size_box.setValidator(shared_double_validator(0, 1000, 3))
     return size_box, label
 
 
 def add_chart_line_style(title, linestyle, options):
     label = QLabel(title)
     style_box = QComboBox()
-    for s in options:
-        style_box.addItem(s)
+    style_box.addItems(options)
     style_box.setCurrentIndex(options.index(linestyle))
     return style_box, label
 
@@ -238,8 +256,7 @@ def add_chart_line_style(title, linestyle, options):
 def add_chart_marker_style(title, style, options):
     label = QLabel(title)
     style_box = QComboBox()
-    for s in options:
-        style_box.addItem(s)
+    style_box.addItems(list(options))
     index = list(options.values()).index(style)
     style_box.setCurrentIndex(index)
     return style_box, label
@@ -260,8 +277,7 @@ def add_chart_colormap_edits(colormap: str, options, labelstr: str):
     else:
         rev_map_box.setChecked(False)
     map_box = QComboBox()
-    for c in options:
-        map_box.addItem(c)
+    map_box.addItems(list(options))
     index = list(options.values()).index(colormap)
     map_box.setCurrentIndex(index)
 
@@ -7,14 +7,22 @@ published or calculated sources
 other tests are strictly functional (e.g., bootstrapping and randomization), checking that interfaces haven't
 broken or producing figures that can be  visually examined to see if they look correct
 
-whether figures are displayed or not across tests is controlled by the global boolean TEST_FIGURES
+whether figures are displayed or not across tests is controlled by the global boolean TEST_FIGURES, and the size of
+the resampling in the functional tests by SMOKE_TEST_REPLICATES
+
+by default each figure is drawn and shown but closes itself once it is on screen, so the full suite (plotting code
+included) runs without anyone present; setting the environment variable METAWIN_INTERACTIVE=1 turns on
+INTERACTIVE_FIGURES, where each figure instead waits in a dialog until it is dismissed so it can be examined
 """
 
 
+import functools
 import math
+import os
 from typing import Tuple
 
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QFrame, QPushButton, QTextEdit
+from PyQt6.QtWidgets import QApplication, QDialog, QVBoxLayout, QFrame, QPushButton, QTextEdit
+from PyQt6.QtTest import QTest
 import matplotlib.colors as mcolors
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
@@ -31,15 +39,19 @@ from MetaWinData import MetaWinData
 import MetaWinEffectFunctions
 import MetaWinAnalysis
 import MetaWinPubBias
+import MetaWinPubBiasFunctions
 import MetaWinTree
 import MetaWinDraw
 import MetaWinUtils
 
 
 TEST_FIGURES = True
-# if the following line is not present, the tests with figures all crash for no obvious
-# reason. The call must be preloading something
-FIGURE_CANVAS = FigureCanvasQTAgg(Figure(figsize=(8, 6)))
+INTERACTIVE_FIGURES = os.environ.get("METAWIN_INTERACTIVE") == "1"
+# number of bootstrap or randomization replicates used by the functional tests which do not check the resampled
+# values; raise this (e.g., to 9999) to exercise analyses at full size
+SMOKE_TEST_REPLICATES = 99
+# every figure dialog needs a QApplication; a single one is created here and shared by all of the tests
+QT_APP = QApplication.instance() or QApplication([])
 
 
 class TestFigureDialog(QDialog):
@@ -72,6 +84,17 @@ class TestFigureDialog(QDialog):
         self.setLayout(main_layout)
 
 
+def show_test_figure(chart_data, figure=None, timeout_ms: int = 1000) -> None:
+    if TEST_FIGURES:
+        test_win = TestFigureDialog(chart_data, figure)
+        if INTERACTIVE_FIGURES:
+            test_win.exec()
+        else:
+            test_win.show()
+            QTest.qWaitForWindowExposed(test_win, timeout_ms)
+            test_win.close()
+
+
 def print_test_output(output: list) -> None:
     for block in output:
         print()
@@ -79,13 +102,21 @@ def print_test_output(output: list) -> None:
             print(line)
 
 
-def import_test_data(filename: str) -> Tuple[MetaWinData, list]:
+@functools.lru_cache(maxsize=None)
+def read_test_file(filename: str) -> Tuple[str, ...]:
     with open(filename, "r") as infile:
-        indata = infile.readlines()
-        import_options = ImportTextOptions()
-        import_options.col_headers = True
-        data = split_text_data(indata, import_options)
-        convert_strings_to_numbers(data)
+        return tuple(infile.readlines())
+
+
+def import_test_data(filename: str) -> Tuple[MetaWinData, list]:
+    """
+    the lines of each test file are only read once, but the data is rebuilt every call as many tests add
+    columns or filters to it (parsing is also faster than deep copying a cached MetaWinData)
+    """
+    import_options = ImportTextOptions()
+    import_options.col_headers = True
+    data = split_text_data(list(read_test_file(filename)), import_options)
+    convert_strings_to_numbers(data)
     return data, import_options.return_output()
 
 
@@ -139,15 +170,17 @@ def test_data_import() -> None:
     print_test_output(import_output)
     for c, col in enumerate(data.cols):
         assert col.label == col_headers[c]
-    for r, row in enumerate(data.rows):
-        for c, col in enumerate(data.cols):
-            assert data.value(r, c).value == answer[r][c]
+    assert [[data.value(r, c).value for c in range(data.ncols())] for r in range(data.nrows())] == answer
 
 
-def calc_hedges_d() -> Tuple[MetaWinData, list]:
+def calc_gur_hed_effects(effect_size: MetaWinEffectFunctions.MetaWinEffectFunction) -> Tuple[MetaWinData, list]:
+    """
+    calculate an effect size from the means, standard deviations, and sample sizes of the Gurevitch and Hedges
+    data, adding the effect size and its variance as columns 10 and 11
+    """
     data, _ = import_test_data("gur_hed.txt")
     options = EffectSizeOptions()
-    options.effect_size = MetaWinEffectFunctions.hedges_d_function()
+    options.effect_size = effect_size
     options.control_means = data.cols[4]
     options.treatment_means = data.cols[5]
     options.control_sd = data.cols[6]
@@ -159,6 +192,10 @@ def calc_hedges_d() -> Tuple[MetaWinData, list]:
     return data, output
 
 
+def calc_hedges_d() -> Tuple[MetaWinData, list]:
+    return calc_gur_hed_effects(MetaWinEffectFunctions.hedges_d_function())
+
+
 def test_hedges_d() -> None:
     # answers from MetaWin 2
     answer = [[0.0362, 0.2858],
@@ -208,24 +245,12 @@ def test_hedges_d() -> None:
     data, output = calc_hedges_d()
     print_test_output(output)
     # effect size will be in column 10, variance in column 11
-    for r, row in enumerate(data.rows):
-        assert round(data.value(r, 10).value, 4) == answer[r][0]
-        assert round(data.value(r, 11).value, 4) == answer[r][1]
+    assert [[round(data.value(r, 10).value, 4), round(data.value(r, 11).value, 4)]
+            for r in range(data.nrows())] == answer
 
 
 def calc_ln_response_ratio() -> Tuple[MetaWinData, list]:
-    data, _ = import_test_data("gur_hed.txt")
-    options = EffectSizeOptions()
-    options.effect_size = MetaWinEffectFunctions.ln_rr_function()
-    options.control_means = data.cols[4]
-    options.treatment_means = data.cols[5]
-    options.control_sd = data.cols[6]
-    options.treatment_sd = data.cols[7]
-    options.control_n = data.cols[2]
-    options.treatment_n = data.cols[3]
-    options.polarity = data.cols[1]
-    output, _, _ = do_effect_calculations(data, options, 4)
-    return data, output
+    return calc_gur_hed_effects(MetaWinEffectFunctions.ln_rr_function())
 
 
 def test_ln_response_ratio() -> None:
@@ -284,10 +309,9 @@ def test_ln_response_ratio() -> None:
     data, output = calc_ln_response_ratio()
     print_test_output(output)
     # effect size will be in column 10, variance in column 11
-    for r, row in enumerate(data.rows):
-        if (data.value(r, 10) is not None) and answer[r][0] is not None:
-            assert round(data.value(r, 10).value, 4) == answer[r][0]
-            assert round(data.value(r, 11).value, 4) == answer[r][1]
+    tested = [r for r in range(data.nrows()) if (data.value(r, 10) is not None) and answer[r][0] is not None]
+    assert [[round(data.value(r, 10).value, 4), round(data.value(r, 11).value, 4)] for r in tested] == \
+           [answer[r] for r in tested]
 
 
 def test_simple_meta_analysis():
@@ -314,9 +338,7 @@ def test_simple_meta_analysis():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     mean_values = analysis_values.mean_data
 
@@ -351,9 +373,7 @@ def test_simple_meta_analysis_lep():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     mean_values = analysis_values.mean_data
 
@@ -401,9 +421,7 @@ def test_simple_meta_analysis_lep_randeff():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     mean_values = analysis_values.mean_data
 
@@ -473,14 +491,12 @@ def test_simple_meta_analysis_bootstrap():
     options.structure = MetaWinAnalysis.SIMPLE_MA
     options.effect_data = data.cols[10]
     options.effect_vars = data.cols[11]
-    options.bootstrap_mean = 9999
+    options.bootstrap_mean = SMOKE_TEST_REPLICATES
     options.create_graph = True
 
     output, chart_data, _ = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_group_meta_analysis_lep_suborders():
@@ -519,9 +535,7 @@ def test_group_meta_analysis_lep_suborders():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     global_values = analysis_values.global_values
     group_mean_values = analysis_values.group_mean_values
@@ -573,9 +587,7 @@ def test_group_meta_analysis_lep_suborders_rand_eff():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     global_values = analysis_values.global_values
     model_het = analysis_values.model_het_values
@@ -654,9 +666,7 @@ def test_group_meta_analysis_lep_families():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     global_values = analysis_values.global_values
     group_mean_values = analysis_values.group_mean_values
@@ -691,14 +701,12 @@ def test_group_meta_analysis_bootstrap():
     options.effect_data = data.cols[10]
     options.effect_vars = data.cols[11]
     options.groups = data.cols[0]
-    options.bootstrap_mean = 9999
+    options.bootstrap_mean = SMOKE_TEST_REPLICATES
     options.create_graph = True
 
     output, chart_data, _ = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_group_meta_analysis_lrr():
@@ -710,15 +718,13 @@ def test_group_meta_analysis_lrr():
     options.effect_vars = data.cols[11]
     options.groups = data.cols[0]
     options.log_transformed = True
-    options.bootstrap_mean = 9999
+    options.bootstrap_mean = SMOKE_TEST_REPLICATES
 
     options.create_graph = True
 
     output, chart_data, _ = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_group_meta_analysis_randomization():
@@ -729,7 +735,7 @@ def test_group_meta_analysis_randomization():
     options.effect_data = data.cols[10]
     options.effect_vars = data.cols[11]
     options.groups = data.cols[0]
-    options.randomize_model = 9999
+    options.randomize_model = SMOKE_TEST_REPLICATES
 
     output, *_ = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
@@ -748,9 +754,7 @@ def test_cumulative_meta_analysis():
 
     output, chart_data, _ = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_cumulative_meta_analysis_bootstrap():
@@ -761,15 +765,13 @@ def test_cumulative_meta_analysis_bootstrap():
     options.effect_data = data.cols[10]
     options.effect_vars = data.cols[11]
     options.cumulative_order = data.cols[9]
-    options.bootstrap_mean = 999
+    options.bootstrap_mean = SMOKE_TEST_REPLICATES
 
     options.create_graph = True
 
     output, chart_data, _ = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_regression_meta_analysis_lep():
@@ -797,9 +799,7 @@ def test_regression_meta_analysis_lep():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     global_values = analysis_values.global_values
     model_het = analysis_values.model_het_values
@@ -843,9 +843,7 @@ def test_regression_meta_analysis_lep_randeff():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     global_values = analysis_values.global_values
     model_het = analysis_values.model_het_values
@@ -1124,9 +1122,7 @@ def test_nested_meta_analysis_lep():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     global_values = analysis_values.global_values
     model_het = analysis_values.model_het_values
@@ -1218,14 +1214,11 @@ def test_tree_import():
     tree = MetaWinTree.read_newick_tree(newick_str)
 
     assert tree.n_tips() == n_answer
-    taxa_list = tree.tip_names()
-    for i, taxon in enumerate(taxa_list):
-        assert taxon == names_answer[i]
+    assert tree.tip_names() == names_answer
 
     if TEST_FIGURES:
         figure = MetaWinCharts.chart_phylogeny(tree)
-        test_win = TestFigureDialog("imported phylogeny", figure)
-        test_win.exec()
+        show_test_figure("imported phylogeny", figure)
 
 
 def test_scatter_plot():
@@ -1234,8 +1227,7 @@ def test_scatter_plot():
     y_col = data.cols[10]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_scatter_plot(data, x_col, y_col)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_normal_quantile_plot():
@@ -1244,8 +1236,7 @@ def test_normal_quantile_plot():
     v_col = data.cols[11]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_normal_quantile_plot(data, e_col, v_col)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_radial_plot_d():
@@ -1254,8 +1245,7 @@ def test_radial_plot_d():
     v_col = data.cols[11]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_radial_plot(data, e_col, v_col, False)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_radial_plot_lnrr():
@@ -1264,8 +1254,7 @@ def test_radial_plot_lnrr():
     v_col = data.cols[11]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_radial_plot(data, e_col, v_col, True)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_histogram_d_unweighted():
@@ -1274,8 +1263,7 @@ def test_histogram_d_unweighted():
     v_col = data.cols[11]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_histogram_plot(data, e_col, v_col, 0, 10)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_histogram_d_weighted_invvar():
@@ -1284,8 +1272,7 @@ def test_histogram_d_weighted_invvar():
     v_col = data.cols[11]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_histogram_plot(data, e_col, v_col, 1, 10)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_histogram_d_weighted_sample_size():
@@ -1294,8 +1281,7 @@ def test_histogram_d_weighted_sample_size():
     v_col = data.cols[2]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_histogram_plot(data, e_col, v_col, 2, 15)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_forest_plot():
@@ -1304,8 +1290,7 @@ def test_forest_plot():
     v_col = data.cols[11]
     if TEST_FIGURES:
         chart_data = MetaWinDraw.draw_forest_plot(data, e_col, v_col)
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+        show_test_figure(chart_data)
 
 
 def test_trim_and_fill_analysis():
@@ -1315,12 +1300,7 @@ def test_trim_and_fill_analysis():
     due to publication bias
     """
     filename = "funnel_test.txt"
-    with open(filename, "r") as infile:
-        indata = infile.readlines()
-        import_options = ImportTextOptions()
-        import_options.col_headers = True
-        data = split_text_data(indata, import_options)
-        convert_strings_to_numbers(data)
+    data, _ = import_test_data(filename)
 
     options = MetaWinPubBias.PubBiasOptions()
     options.pub_bias_test = MetaWinPubBias.TRIM_FILL
@@ -1332,9 +1312,7 @@ def test_trim_and_fill_analysis():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_trim_and_fill_analysis_negative_mean():
@@ -1342,15 +1320,10 @@ def test_trim_and_fill_analysis_negative_mean():
     reverse the funnel plot to test when the bias applies to the other side of the mean
     """
     filename = "funnel_test.txt"
-    with open(filename, "r") as infile:
-        indata = infile.readlines()
-        import_options = ImportTextOptions()
-        import_options.col_headers = True
-        data = split_text_data(indata, import_options)
-        convert_strings_to_numbers(data)
-
-    for r in range(data.nrows()):
-        data.replace_value(r, 1, -data.value(r, 1).value)
+    data, _ = import_test_data(filename)
+
+    for value in data.cols[1].values:
+        value.value = -value.value
     options = MetaWinPubBias.PubBiasOptions()
     options.pub_bias_test = MetaWinPubBias.TRIM_FILL
     options.effect_data = data.cols[1]
@@ -1361,9 +1334,50 @@ def test_trim_and_fill_analysis_negative_mean():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
+
+
+def test_rank_correlation_analysis():
+    """
+    funnel_test.txt contains a simulated data set with deliberate publication bias, so the randomization test
+    of either rank correlation should find it to be significant
+    """
+    filename = "funnel_test.txt"
+    data, _ = import_test_data(filename)
+
+    for cor_test in ("tau", "rho"):
+        options = MetaWinPubBias.PubBiasOptions()
+        options.pub_bias_test = MetaWinPubBias.RANKCOR
+        options.effect_data = data.cols[1]
+        options.effect_vars = data.cols[0]
+        options.cor_test = cor_test
+        options.randomize_model = 999
+
+        output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
+        print_test_output(output)
+        p_lines = [line for block in output for line in block if line.startswith("Probability = ")]
+        assert len(p_lines) == 1
+        assert float(p_lines[0][len("Probability = "):]) < 0.05
+
+
+def test_kendalls_tau():
+    """
+    compare the merge sort calculation of Kendall's tau to the calculation in scipy, both with and without
+    tied values, and when correlating a matrix of permutations
+    """
+    rng = numpy.random.default_rng(1)
+    for n, max_value in ((10, 1000), (85, 1000), (200, 20), (500, 5)):
+        x = rng.integers(0, max_value, n)
+        y = rng.integers(0, max_value, n)
+        e_ranks = MetaWinPubBiasFunctions.get_ranks(y)
+        x_ranks = MetaWinPubBiasFunctions.get_ranks(x)
+        answer = scipy.stats.kendalltau(x, y).statistic
+        assert round(MetaWinPubBiasFunctions.kendalls_tau(e_ranks, x_ranks), 10) == round(answer, 10)
+
+        perm_ranks = rng.permuted(numpy.tile(e_ranks, (5, 1)), axis=1)
+        taus = MetaWinPubBiasFunctions.kendalls_tau(perm_ranks, x_ranks)
+        for i in range(5):
+            assert round(taus[i], 10) == round(scipy.stats.kendalltau(x_ranks, perm_ranks[i]).statistic, 10)
 
 
 def test_tree_functions():
@@ -1378,6 +1392,52 @@ def test_tree_functions():
     assert tip2 is not None
     assert tip3 is None
 
+    nodes, parent, branch_lengths = tree.to_arrays()
+    i = nodes.index(tip1)
+    assert nodes[parent[i]] is tip1.ancestor
+    assert branch_lengths[i] == tip1.branch_length
+    assert parent[0] == -1
+
+    # cached summaries must follow changes to the tree
+    n = tree.n_tips()
+    max_length = tree.max_node_tip_length()
+    new_tip = MetaWinTree.Node()
+    new_tip.name = "Hello, World"
+    new_tip.branch_length = 10
+    tip1.add_child(new_tip)
+    assert tree.n_tips() == n
+    assert tree.tip_names().count("Hello, World") == 1
+    assert "Homo" not in tree.tip_names()
+    assert tree.max_node_tip_length() > max_length
+    new_tip.branch_length = 0
+    assert tree.max_node_tip_length() == max_length
+    new_tip.name = "Homo"
+    assert "Homo" in tree.tip_names()
+    assert tree.find_tip_by_name("Hello, World") is None
+    assert tree.find_tip_by_name("Homo") is tip1
+    tip1.name = "Hello, World"
+    assert tree.find_tip_by_name("Hello, World") is tip1
+
+
+def test_deep_tree():
+    """
+    a fully pectinate (caterpillar) tree deeper than the python recursion limit
+    """
+    n = 3000
+    newick_str = "(" * n + "A:1" + "".join(",T{}:1):1".format(i) for i in range(n)) + ";"
+    tree = MetaWinTree.read_newick_tree(newick_str)
+    assert tree.n_tips() == n + 1
+    assert tree.max_node_tip_length() == n + 1
+    newick_out = tree.output_newick("0.0f")
+    assert MetaWinTree.read_newick_tree(newick_out).output_newick("0.0f") == newick_out
+    tip1 = tree.find_tip_by_name("A")
+    tip2 = tree.find_tip_by_name("T0")
+    tip3 = tree.find_tip_by_name("T{}".format(n - 1))
+    assert tip1.distance_on_tree(tip2) == 2
+    assert tip1.distance_on_tree(tip3) == n + 1
+    assert tip3.is_descendant(tip1) is False
+    assert tip1.common_ancestor(tip3).is_descendant(tip2)
+
 
 def test_jackknife():
     data, _ = import_test_data("lepidoptera.txt")
@@ -1390,9 +1450,7 @@ def test_jackknife():
     output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_phylogenetic_simple_test():
@@ -1435,89 +1493,25 @@ def test_phylogenetic_glm_simple():
     tree = MetaWinTree.read_newick_tree(newick_str)
 
     options = MetaWinAnalysis.MetaAnalysisOptions()
-    options.effect_data = data.cols[1]
-    options.effect_vars = data.cols[2]
     options.tip_names = data.cols[0]
     options.random_effects = True
 
-    options.structure = MetaWinAnalysis.SIMPLE_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
-    print_test_output(output)
-    options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
-    print(data.column_labels()[1])
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
-    print_test_output(output)
-
-    print()
-    print()
-    print(20*"-")
-    print()
-    print(data.column_labels()[3])
-    options.effect_data = data.cols[3]
-    options.effect_vars = data.cols[4]
-
-    options.structure = MetaWinAnalysis.SIMPLE_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
-    print_test_output(output)
-    options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
-    print_test_output(output)
-
-    print()
-    print()
-    print(20*"-")
-    print()
-    print(data.column_labels()[5])
-    options.effect_data = data.cols[5]
-    options.effect_vars = data.cols[6]
-    options.structure = MetaWinAnalysis.SIMPLE_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
-    print_test_output(output)
-    options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
-    print_test_output(output)
-
-    print()
-    print()
-    print(20*"-")
-    print()
-    print(data.column_labels()[7])
-    options.effect_data = data.cols[7]
-    options.effect_vars = data.cols[8]
-    options.structure = MetaWinAnalysis.SIMPLE_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
-    print_test_output(output)
-    options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
-    print_test_output(output)
-
-    print()
-    print()
-    print(20*"-")
-    print()
-    print(data.column_labels()[9].upper())
-    options.effect_data = data.cols[9]
-    options.effect_vars = data.cols[10]
-    options.structure = MetaWinAnalysis.SIMPLE_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
-    print_test_output(output)
-    options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
-    print_test_output(output)
-
-    print()
-    print()
-    print(20*"-")
-    print()
-    print(data.column_labels()[11].upper())
-    options.effect_data = data.cols[11]
-    options.effect_vars = data.cols[12]
-    options.structure = MetaWinAnalysis.SIMPLE_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
-    print_test_output(output)
-    options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
-    output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
-    print_test_output(output)
+    # each response in the herbivore data is a pair of effect size and variance columns; the same tree and
+    # options are reused for all of them
+    for effect_col in range(1, 13, 2):
+        print()
+        print()
+        print(20*"-")
+        print()
+        print(data.column_labels()[effect_col])
+        options.effect_data = data.cols[effect_col]
+        options.effect_vars = data.cols[effect_col + 1]
+        options.structure = MetaWinAnalysis.SIMPLE_MA
+        output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4)
+        print_test_output(output)
+        options.structure = MetaWinAnalysis.PHYLOGENETIC_MA
+        output, chart_data, analysis_values = MetaWinAnalysis.do_meta_analysis(data, options, 4, tree=tree)
+        print_test_output(output)
 
 
 def test_colors():
@@ -1564,12 +1558,7 @@ def test_funnel_plots():
     this test runs through all 5 variants of a funnel plot
     """
     filename = "funnel_test2.txt"
-    with open(filename, "r") as infile:
-        indata = infile.readlines()
-        import_options = ImportTextOptions()
-        import_options.col_headers = True
-        data = split_text_data(indata, import_options)
-        convert_strings_to_numbers(data)
+    data, _ = import_test_data(filename)
 
     options = MetaWinPubBias.PubBiasOptions()
     options.pub_bias_test = MetaWinPubBias.FUNNEL
@@ -1583,9 +1572,7 @@ def test_funnel_plots():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     # variance funnel
     options.sample_size = None
@@ -1596,9 +1583,7 @@ def test_funnel_plots():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     # inverse variance funnel
     options.funnel_y = "inverse variance"
@@ -1606,9 +1591,7 @@ def test_funnel_plots():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     # standard error funnel
     options.funnel_y = "standard error"
@@ -1616,9 +1599,7 @@ def test_funnel_plots():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
     # precision funnel
     options.funnel_y = "precision"
@@ -1626,9 +1607,7 @@ def test_funnel_plots():
     output, chart_data, analysis_values = MetaWinPubBias.do_pub_bias(data, options, 4)
     print_test_output(output)
 
-    if TEST_FIGURES:
-        test_win = TestFigureDialog(chart_data)
-        test_win.exec()
+    show_test_figure(chart_data)
 
 
 def test_linear_regression():